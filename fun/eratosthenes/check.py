@@ -6,10 +6,7 @@ import sys, select
 def distrib(upper_bound):
 
     # load alledged primes
-    primes = []
-
-    for numstr in sys.stdin.readlines():
-        primes.append(int(numstr))
+    primes = list(map(int, sys.stdin.read().split()))
 
     # based on their volume, select a distribution check
     FilterParam = namedtuple("FilterParam", "n p")
@@ -37,10 +34,21 @@ def distrib(upper_bound):
         raise ValueError("No available distribution checks for n < 4")
 
     # fail if they are too sparse
-    for n in range(lower_bound, max(primes)):
-        if not any(filter(primes_between, [FilterParam(n, p) for p in primes])):
+    # every n in range(lower_bound, max(primes)) needs a prime that's close
+    # enough above it.  Between two primes, that's always the next one, and it
+    # only gets closer as n grows, so just the first n of each gap is checked
+    top = max(primes)
+    n = lower_bound
+    for p in sorted(primes):
+        if n >= top:
+            break
+        if p <= n:
+            continue
+        # p is the first prime above n
+        if not primes_between(FilterParam(n, p)):
             print(f"{name} fails for n = {upper_bound}")
             sys.exit(2)
+        n = p
     print(f"{name} passes for n = {upper_bound}")
 
 
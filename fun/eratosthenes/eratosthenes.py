@@ -0,0 +1,151 @@
+import sys
+from collections import deque
+from itertools import compress
+from math import isqrt
+
+# https://en.wikipedia.org/wiki/Sieve_of_Eratosthenes
+#
+# Only odd numbers are sieved: flags[i] says whether 2i + 1 is prime.  Each
+# prime p crosses out its odd multiples from p * p on, in a single slice
+# assignment, so no candidate is ever divided by anything.
+#
+# For big n, segmented_primes sieves one window at a time, with the primes up
+# to the square root of n, so memory stays the same however big n gets.
+
+# odd numbers per window, a bytearray about the size of a cache
+window = 1 << 20
+
+
+def odd_sieve(n):
+    """
+    flags for the odd numbers less than n, 1 where 2i + 1 is prime
+    """
+
+    size = n // 2
+    flags = bytearray([1]) * size
+    if size:
+        flags[0] = 0  # 1 isn't prime
+
+    for i in range(1, (isqrt(max(n - 1, 0)) + 1) // 2):
+        if flags[i]:
+            p = 2 * i + 1
+            start = p * p // 2
+            flags[start::p] = bytes(len(range(start, size, p)))
+
+    return flags
+
+
+def primes_in(start, stop):
+    """
+    All of the primes p with start <= p < stop, in order
+    """
+
+    primes = [2] if start <= 2 < stop else []
+    flags = odd_sieve(stop)
+    first = max(start, 0) // 2
+    primes += [2 * i + 1 for i in compress(range(first, len(flags)), flags[first:])]
+    return primes
+
+
+def primes_below(n):
+    """
+    All of the primes less than n, in order
+    """
+    return primes_in(2, n)
+
+
+def base_primes(stop):
+    """
+    The odd primes that sieve everything less than stop: up to its square root
+    """
+    return primes_in(3, isqrt(max(stop - 1, 0)) + 1)
+
+
+def segmented_primes(start, stop, size=window, base=None):
+    """
+    The primes p with start <= p < stop, as a list per window
+    base, if given, holds at least the odd primes up to the square root of stop
+    """
+
+    if start <= 2 < stop:
+        yield [2]
+
+    if base is None:
+        base = base_primes(stop)
+
+    low = max(start, 3) | 1
+    while low < stop:
+        high = min(low + 2 * size, stop)
+        flags = sieve_window(low, high, base)
+        yield [low + 2 * i for i in compress(range(len(flags)), flags)]
+        low = high
+
+
+def sieve_window(low, high, base):
+    """
+    flags for the odd numbers in [low, high), low odd, 1 where low + 2i is prime
+    base holds the odd primes up to the square root of high; they stay flagged
+    """
+
+    count = (high - low + 1) // 2  # odd numbers in [low, high)
+    flags = bytearray([1]) * count
+    zeros = memoryview(bytes(count))
+
+    for p in base:
+        if p * p >= high:
+            break
+        # the first odd multiple in the window, but nothing below p * p
+        first = max(p * p, -(-low // p) * p)
+        if not first % 2:
+            first += p
+        i = (first - low) // 2
+        if i < count:
+            flags[i::p] = zeros[: (count - 1 - i) // p + 1]
+
+    return flags
+
+
+def ranges(start, stop, count):
+    """
+    Split [start, stop) into count ranges of about the same size, in order
+    """
+
+    count = max(min(count, stop - start), 1)
+    cuts = [start + (stop - start) * i // count for i in range(count + 1)]
+    return list(zip(cuts, cuts[1:]))
+
+
+def write_primes(segments, path="primes", summarize=True):
+    """
+    Write every prime to a file, one per line, and print them, as each list
+    of primes arrives
+    If summarize, print only the first and last 3 with "..." between them
+    """
+
+    count = 0
+    last = deque(maxlen=3)  # (index, prime)
+
+    with open(path, "w") as f:
+        for primes in segments:
+            if not primes:
+                continue
+
+            lines = "\n".join(map(str, primes)) + "\n"
+            f.write(lines)
+
+            if summarize:
+                for p in primes[: max(3 - count, 0)]:
+                    print(p)
+                tail = primes[-3:]
+                last.extend(enumerate(tail, start=count + len(primes) - len(tail)))
+            else:
+                sys.stdout.write(lines)
+
+            count += len(primes)
+
+    if summarize:
+        if count > 3:
+            print("...")
+        for i, p in last:
+            if i > 3:
+                print(p)
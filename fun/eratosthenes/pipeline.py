@@ -1,6 +1,8 @@
 import conducto as co
 from collections import namedtuple
+import os
 import sys
+from eratosthenes import ranges
 
 
 def primes_less_than(n) -> co.Serial:
@@ -24,5 +26,42 @@ def primes_less_than_fixed(n) -> co.Serial:
     return root
 
 
+# the parallel version keeps its files here, where every node can see them
+data_dir = "/conducto/data/pipeline"
+
+# a range much smaller than this isn't worth a node of its own
+min_range = 10 ** 7
+
+
+def primes_less_than_parallel(n, nodes=None) -> co.Serial:
+
+    # sieve [2, n) in ranges, side by side, then join them
+    n = int(n)
+    if nodes is None:
+        nodes = min(os.cpu_count() or 1, n // min_range)
+    img = co.Image(copy_dir=".")
+
+    base = f"{data_dir}/base"
+    primes = f"{data_dir}/primes"
+    segments = []
+
+    with co.Serial(image=img) as root:
+        root["base primes"] = co.Exec(f"python segment.py base {n} {base}")
+
+        with co.Parallel(name="find primes") as find:
+            for start, stop in ranges(2, n, int(nodes)):
+                segment = f"{data_dir}/segment_{start}"
+                segments.append(segment)
+                find[f"{start}-{stop}"] = co.Exec(
+                    f"python segment.py range {start} {stop} {base} {segment}")
+
+        root["merge"] = co.Exec(f"python segment.py merge {primes} {' '.join(segments)}")
+        if n >= 3:
+            root["check distribution"] = co.Exec(f"cat {primes} | python check.py {n}")
+        root["is 2 included?"] = co.Exec(f"egrep '^2$' {primes}")
+
+    return root
+
+
 if __name__ == "__main__":
     co.main()
@@ -1,4 +1,5 @@
 import conducto as co
+from eratosthenes import primes_below
 
 
 def sieve(n: int):
@@ -6,11 +7,8 @@ def sieve(n: int):
     Print all of the prime numbers less than n
     """
 
-    primes = []
-    for i in range(2, n):
-        if all([i % p for p in primes]):
-            primes.append(i)
-            print(i)
+    for p in primes_below(n):
+        print(p)
 
 
 # A pipeline which generates primes and runs some tests on the list
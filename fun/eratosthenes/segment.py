@@ -0,0 +1,77 @@
+import os
+import shutil
+import sys
+from eratosthenes import base_primes, segmented_primes, write_primes
+
+# The primes less than n, a range at a time, so that ranges can be sieved side
+# by side and joined afterwards:
+#
+#   python segment.py base N BASE                 primes to sieve with, into BASE
+#   python segment.py range START STOP BASE OUT   primes in [START, STOP), into OUT
+#   python segment.py merge OUT SEGMENT...        join the ranges, in order, into OUT
+
+
+def base(n, path):
+    """
+    Write the primes that sieve everything less than n, one per line
+    """
+
+    with open(path, "w") as f:
+        f.writelines(f"{p}\n" for p in base_primes(n))
+
+
+def sieve_range(start, stop, base_path, path):
+    """
+    Write the primes in [start, stop) to a file, sieved by the primes in base_path
+    """
+
+    with open(base_path) as f:
+        primes = [int(line) for line in f]
+
+    segments = segmented_primes(start, stop, base=primes)
+    write_primes(segments, path, summarize=True)
+
+
+def merge(path, segments, tail=4096):
+    """
+    Concatenate segment files into one, in the order given
+    Each is already sorted and they don't overlap, so nothing is sorted again
+    Print the first and last 3 primes, like write_primes
+    """
+
+    with open(path, "wb") as out:
+        for segment in segments:
+            with open(segment, "rb") as f:
+                shutil.copyfileobj(f, out)
+
+    # just the ends of the file, however big it is
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(0)
+        head = f.read(tail).split()
+        f.seek(max(size - tail, 0))
+        end = f.read().split()
+
+    # the same lines write_primes would print, even for a handful of primes
+    short = size <= tail
+    last = head[max(len(head) - 3, 4):] if short else end[-3:]
+
+    for p in head[:3]:
+        print(p.decode())
+    if len(head) > 3 or not short:
+        print("...")
+    for p in last:
+        print(p.decode())
+
+
+if __name__ == "__main__":
+    command, args = sys.argv[1], sys.argv[2:]
+
+    if command == "base":
+        base(int(args[0]), args[1])
+    elif command == "range":
+        sieve_range(int(args[0]), int(args[1]), args[2], args[3])
+    elif command == "merge":
+        merge(args[0], args[1:])
+    else:
+        sys.exit(f"unknown command: {command}")
@@ -1,33 +1,11 @@
 #!/usr/bin/env python3
 import sys
+from eratosthenes import segmented_primes, write_primes
 
 num = int(sys.argv[1])
 
 # https://en.wikipedia.org/wiki/Sieve_of_Eratosthenes
-primes = []
-for i in range(3, num):
-    if all([i % p for p in primes]):
-        primes.append(i)
+primes = segmented_primes(3, num)
 
-# write output
-with open("primes", "w") as f:
-    dots = False
-    count = len(primes)
-    for num, p in enumerate(primes):
-
-        # write to file no matter what
-        f.write(str(p) + "\n")
-
-        if sys.stdout.isatty():
-            # summarize output for humans
-            if num < 3:
-                print(p)
-            elif count - num <= 3 and num > 3:
-                print(p)
-            else:
-                if not dots:
-                    print("...")
-                    dots = True
-        else:
-            # full output for robots
-            print(p)
+# write output, summarize it for humans, full output for robots
+write_primes(primes, "primes", summarize=sys.stdout.isatty())
@@ -0,0 +1,185 @@
+import fcntl
+import mmap
+import os
+import sys
+from eratosthenes import base_primes, sieve_window
+
+# A prime store: which numbers are prime, kept on disk and reused between runs.
+#
+# Only 8 of every 30 numbers can be prime past 5, the ones with no factor of
+# 2, 3 or 5, so the store is a wheel: byte i holds one bit for each of
+# 30i + 1, 30i + 7, ..., 30i + 29.  That's 8 bits per 30 numbers, about 33 MB
+# for every number below a billion.
+#
+# Each byte depends on nothing after it, so the file only ever grows at the
+# end, and any prefix of it is a good store for a smaller n.  Asking for a
+# bigger n sieves from where the file stops.
+#
+#   python store.py extend N      make sure the store covers every number < N
+#   python store.py is_prime K    exit nonzero if K isn't prime
+#   python store.py pi K          how many primes are <= K
+#   python store.py primes A B    the primes in [A, B), one per line
+
+residues = (1, 7, 11, 13, 17, 19, 23, 29)
+bit = {r: 1 << j for j, r in enumerate(residues)}
+
+# the numbers in a byte, by its value, and how many there are
+numbers = [tuple(r for j, r in enumerate(residues) if b >> j & 1) for b in range(256)]
+popcount = bytes(len(n) for n in numbers)
+
+# 2, 3 and 5 aren't on the wheel
+small = (2, 3, 5)
+
+# bytes sieved at a time, 30 numbers each
+window = 1 << 16
+
+
+def default_path():
+    """
+    The pipeline's data dir when running in conducto, else the user's data dir
+    """
+
+    if os.path.isdir("/conducto/data/pipeline"):
+        return "/conducto/data/pipeline/primes.wheel"
+    data = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(data, "eratosthenes", "primes.wheel")
+
+
+def wheel_bytes(first, last, base):
+    """
+    The store's bytes for the numbers in [30 * first, 30 * last)
+    """
+
+    low, high = 30 * first + 1, 30 * last
+    flags = sieve_window(low, high, base)
+    if first == 0:
+        flags[0] = 0  # 1 isn't prime
+
+    # the odd numbers come 15 to a byte; pick the 8 on the wheel out of each
+    # 15, as one bit per byte of a big int, and shift them into place
+    packed = 0
+    for j, r in enumerate(residues):
+        packed |= int.from_bytes(flags[r // 2 :: 15], "little") << j
+    return packed.to_bytes(last - first, "little")
+
+
+def count_bits(data):
+    """
+    How many bits are set in data
+    """
+
+    counts = data.translate(popcount)
+    return sum(n * counts.count(n) for n in range(1, 9))
+
+
+class PrimeStore:
+    """
+    The primes below some bound, from a wheel file, memory mapped
+    Queries past the bound extend the file first
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "ab"):
+            pass
+        self.data = b""
+        self._load()
+
+    def _load(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @property
+    def bound(self):
+        """
+        Every number below this has been sieved
+        """
+        return 30 * len(self.data)
+
+    def extend(self, n):
+        """
+        Make sure every number below n is in the store, sieving only what's new
+        """
+
+        if n <= self.bound:
+            return
+
+        with open(self.path, "ab") as f:
+            # another process may be extending the same file
+            fcntl.flock(f, fcntl.LOCK_EX)
+            first = os.fstat(f.fileno()).st_size
+            last = -(-n // 30)
+            base = base_primes(30 * last)
+
+            for start in range(first, last, window):
+                stop = min(start + window, last)
+                f.write(wheel_bytes(start, stop, base))
+
+        self._load()
+
+    def is_prime(self, k):
+        """
+        Whether k is prime
+        """
+
+        if k < 7:
+            return k in small
+        self.extend(k + 1)
+        i, r = divmod(k, 30)
+        return bool(self.data[i] & bit.get(r, 0))
+
+    def pi(self, k):
+        """
+        How many primes are <= k
+        """
+
+        if k < 7:
+            return sum(p <= k for p in small)
+        self.extend(k + 1)
+
+        i, r = divmod(k, 30)
+        last = self.data[i] & sum(b for s, b in bit.items() if s <= r)
+        whole = sum(count_bits(self.data[j : min(j + window, i)])
+                    for j in range(0, i, window))
+        return len(small) + whole + len(numbers[last])
+
+    def primes_in(self, a, b):
+        """
+        All of the primes p with a <= p < b, in order
+        """
+
+        primes = [p for p in small if a <= p < b]
+        if b <= 7:
+            return primes
+        self.extend(b)
+
+        first, last = max(a, 0) // 30, -(-b // 30)
+        primes += [30 * i + r
+                   for i, byte in enumerate(self.data[first:last], start=first)
+                   for r in numbers[byte]
+                   if a <= 30 * i + r < b]
+        return primes
+
+
+if __name__ == "__main__":
+    command, args = sys.argv[1], [int(arg) for arg in sys.argv[2:]]
+    store = PrimeStore()
+
+    if command == "extend":
+        store.extend(args[0])
+        print(f"{store.bound} numbers in {store.path}")
+    elif command == "is_prime":
+        prime = store.is_prime(args[0])
+        print(f"{args[0]} is {'' if prime else 'not '}prime")
+        sys.exit(0 if prime else 1)
+    elif command == "pi":
+        print(store.pi(args[0]))
+    elif command == "primes":
+        for p in store.primes_in(args[0], args[1]):
+            print(p)
+    else:
+        sys.exit(f"unknown command: {command}")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# compare the bitboard engine with the numpy and pure python ones
+# use like:
+#   python bench/bitboard.py [generations] [side ...]
+import sys
+import time
+import numpy as np
+from life.stage import step, array_to_grid
+from life.bitboard import to_words, step_words
+
+# biggest boards worth trying on the slower engines
+python_limit = 1000
+numpy_limit = 10000
+
+# one generation the way the original neighborhood code did it, in pure python
+def python_step(grid):
+
+    rows, cols = len(grid), len(grid[0])
+
+    def alive(x, y):
+        return 0 <= x < cols and 0 <= y < rows and grid[y][x] == '1'
+
+    out = []
+    for y in range(rows):
+        row = []
+        for x in range(cols):
+            n = sum(alive(x + dx, y + dy)
+                    for dx in (-1, 0, 1)
+                    for dy in (-1, 0, 1)
+                    if not (dx == dy == 0))
+            row.append('1' if n == 3 or (n == 2 and grid[y][x] == '1') else '0')
+        out.append(''.join(row))
+    return out
+
+def timed(generations, fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) / generations
+
+if __name__ == "__main__":
+
+    generations = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    sides = [ int(a) for a in sys.argv[2:] ] or [10, 100, 1000, 10000, 20000]
+
+    print(f"{'side':>6} {'python':>12} {'numpy':>12} {'bitboard':>12}  (seconds per generation)")
+    for side in sides:
+        board = (np.random.RandomState(0).random_sample((side, side)) < 0.3).astype(np.uint8)
+
+        def run_python():
+            grid = array_to_grid(board)
+            for _ in range(generations):
+                grid = python_step(grid)
+
+        def run_numpy():
+            b = board
+            for _ in range(generations):
+                b = step(b)
+
+        def run_bitboard():
+            w = to_words(board)
+            for _ in range(generations):
+                w = step_words(w, side)
+
+        results = []
+        for fn, limit in ((run_python, python_limit),
+                          (run_numpy, numpy_limit),
+                          (run_bitboard, None)):
+            if limit is None or side <= limit:
+                results.append(f"{timed(generations, fn):12.6f}")
+            else:
+                results.append(f"{'skipped':>12}")
+
+        print(f"{side:>6} " + " ".join(results))
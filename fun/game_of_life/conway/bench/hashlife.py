@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# compare Hashlife with the neighborhood path the pipeline uses
+# use like:
+#   python bench/hashlife.py [side] [generations]
+import sys
+import json
+import time
+import numpy as np
+from life.stage import (grid_as_neighborhoods, input_to_grid,
+                        array_to_grid, step)
+from life.hashlife import Universe, clear_caches
+
+# one tick the way the pipeline plays it: neighborhoods, rules, back to a grid
+def neighborhood_tick(grid):
+    neighborhoods = grid_as_neighborhoods(grid)
+    for n in neighborhoods:
+        n['alive'] = n['neighbors'] == 3 or (n['alive'] and n['neighbors'] == 2)
+    return input_to_grid(json.dumps(neighborhoods))
+
+def timed(label, generations, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {generations:>10} generations {elapsed:>9.3f}s"
+          f" {elapsed / generations * 1e6:>12.1f}us/generation")
+
+if __name__ == "__main__":
+
+    side = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+    generations = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+
+    # a random soup in the middle of an empty board
+    board = np.zeros((side, side), dtype=np.uint8)
+    quarter = side // 4
+    soup = np.random.RandomState(0).randint(0, 2, (side // 2, side // 2))
+    board[quarter : quarter + side // 2, quarter : quarter + side // 2] = soup
+
+    def neighborhoods():
+        grid = array_to_grid(board)
+        for _ in range(4):
+            grid = neighborhood_tick(grid)
+
+    def numpy_steps():
+        b = board
+        for _ in range(generations):
+            b = step(b)
+
+    def hashlife_jump():
+        clear_caches()
+        Universe.from_array(board).advance(generations)
+
+    def hashlife_far():
+        clear_caches()
+        Universe.from_array(board).advance(1 << 20)
+
+    print(f"{side}x{side} board")
+    timed("neighborhoods", 4, neighborhoods)
+    timed("numpy step", generations, numpy_steps)
+    timed("hashlife", generations, hashlife_jump)
+    timed("hashlife", 1 << 20, hashlife_far)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# how long each console script takes to start, before it does any work
+# the pipeline starts several of these per tick, so it adds up
+# use like:
+#   python bench/startup.py [runs]
+import os
+import re
+import sys
+import time
+import subprocess
+from statistics import median
+
+here = os.path.dirname(os.path.abspath(__file__))
+setup_py = os.path.join(here, '..', 'setup.py')
+
+# heavy modules worth knowing about, if a script happens to import them
+heavy = [ 'numpy', 'PIL', 'pytest' ]
+
+# (script, module, function) for every entry point in setup.py
+def entry_points():
+    with open(setup_py) as f:
+        return re.findall(r"'(\w+) = ([\w.]+):(\w+)'", f.read())
+
+# seconds to start a python that runs some code, the median of several runs
+def startup(code, runs):
+    env = dict(os.environ, PYTHONPATH=os.path.join(here, '..'))
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([ sys.executable, '-c', code ], env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return median(times)
+
+# which of the heavy modules come along with an import
+def imported(module, function):
+    code = (f"import sys; from {module} import {function}; "
+            f"print(' '.join(m for m in {heavy!r} if m in sys.modules))")
+    env = dict(os.environ, PYTHONPATH=os.path.join(here, '..'))
+    out = subprocess.run([ sys.executable, '-c', code ], env=env, check=True,
+                         stdout=subprocess.PIPE)
+    return out.stdout.decode().split()
+
+if __name__ == "__main__":
+
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    python = startup('pass', runs)
+    print(f"{'python itself':>16} {python * 1000:8.1f} ms")
+    print(f"{'script':>16} {'startup':>8}    {'(over python)':>13}  imports")
+
+    for script, module, function in entry_points():
+        seconds = startup(f"from {module} import {function}", runs)
+        print(f"{script:>16} {seconds * 1000:8.1f} ms {(seconds - python) * 1000:+10.1f} ms  "
+              + " ".join(imported(module, function)))
@@ -0,0 +1,82 @@
+import sys
+import numpy as np
+from PIL.GifImagePlugin import getheader, getdata
+from life.stage import iter_boards
+from life.show import image_from_board
+
+# Write an animated GIF one frame at a time.
+#
+# Only the previous frame is kept in memory.  Frames share the global palette
+# from life.show, and each frame after the first only stores the rectangle
+# that changed since the one before it.
+class GifWriter:
+
+    def __init__(self, fp, delay=500, loop=0, changes_only=True):
+        self.fp = fp
+        self.delay = delay  # milliseconds
+        self.loop = loop  # 0 loops forever
+        self.changes_only = changes_only
+        self.previous = None
+        self.frames = 0
+
+    # add a palette image, every frame must be the same size
+    def write(self, image):
+
+        pixels = np.asarray(image)
+
+        if self.previous is None:
+            header, _ = getheader(image, info={ 'loop'     : self.loop,
+                                                'duration' : self.delay })
+            for block in header:
+                self.fp.write(block)
+            box = (0, 0) + image.size
+
+        elif pixels.shape != self.previous.shape:
+            raise ValueError("every frame must be the same size")
+
+        elif self.changes_only:
+            changed = pixels != self.previous
+            rows = np.flatnonzero(changed.any(axis=1))
+            cols = np.flatnonzero(changed.any(axis=0))
+            if rows.size == 0:
+                # nothing changed, but the frame still takes up time
+                box = (0, 0, 1, 1)
+            else:
+                box = (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+
+        else:
+            box = (0, 0) + image.size
+
+        # disposal 1 leaves this frame in place for the next one to draw over
+        frame = image if box == (0, 0) + image.size else image.crop(box)
+        for block in getdata(frame, offset=box[:2], duration=self.delay, disposal=1):
+            self.fp.write(block)
+
+        self.previous = pixels
+        self.frames += 1
+
+    def close(self):
+        if self.frames:
+            self.fp.write(b';')
+
+# render and write a sequence of boards, numbering each frame
+def animate_boards(boards, fp, delay=500, numbered=True):
+    writer = GifWriter(fp, delay=delay)
+    for number, board in enumerate(boards):
+        writer.write(image_from_board(board, number=number if numbered else None))
+    writer.close()
+    return writer.frames
+
+# setuptools entrypoint, streams grids from stdin into an animated gif
+# takes packed grids (like from `life_run --packed`) or json grids, one per line
+# use like:
+#   cat grids | jq -c '.[]' | life_animate life.gif 500
+def life_animate():
+
+    filename = sys.argv[1]
+    delay = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with open(filename, 'wb') as f:
+        frames = animate_boards(iter_boards(sys.stdin.buffer), f, delay=delay)
+
+    print(f"wrote {frames} frames to {filename}")
@@ -0,0 +1,106 @@
+import sys
+import json
+import numpy as np
+from life.stage import load_board, array_to_grid, packed_flag, pack_grid
+
+# Each row of the board is packed into uint64 words, 64 cells per word, cell x
+# in bit x % 64 of word x // 64.  Neighbor counts are added up with bitwise
+# full adders, so every operation works on 64 cells at once, and numpy
+# applies it to every word on the board.
+#
+# Like life.stage, cells beyond the edge of the board are dead.
+
+def to_words(board):
+    rows, cols = board.shape
+    words = -(-cols // 64)
+    packed = np.zeros((rows, words * 8), dtype=np.uint8)
+    packed[:, : -(-cols // 8)] = np.packbits(board, axis=1, bitorder='little')
+    return packed.view('<u8')
+
+def from_words(words, cols):
+    bits = np.ascontiguousarray(words).view(np.uint8)
+    return np.unpackbits(bits, axis=1, count=cols, bitorder='little')
+
+# a mask of the bits that are on the board, per word
+def _mask(cols, words):
+    mask = np.full(words, np.uint64(0xFFFFFFFFFFFFFFFF), dtype=np.uint64)
+    if cols % 64:
+        mask[-1] = np.uint64((1 << (cols % 64)) - 1)
+    return mask
+
+# each cell gets the value of its neighbor to the west (x - 1)
+def _west(w):
+    carry = np.zeros_like(w)
+    carry[:, 1:] = w[:, :-1] >> np.uint64(63)
+    return (w << np.uint64(1)) | carry
+
+# each cell gets the value of its neighbor to the east (x + 1)
+def _east(w):
+    carry = np.zeros_like(w)
+    carry[:, :-1] = w[:, 1:] << np.uint64(63)
+    return (w >> np.uint64(1)) | carry
+
+# the row above and below, with dead rows past the edges
+def _north(w):
+    out = np.zeros_like(w)
+    out[1:] = w[:-1]
+    return out
+
+def _south(w):
+    out = np.zeros_like(w)
+    out[:-1] = w[1:]
+    return out
+
+# advance packed rows by one generation
+def step_words(w, cols):
+
+    west, east = _west(w), _east(w)
+
+    # the three cells in each row, summed as two bit planes (0 to 3)
+    h0 = west ^ w ^ east
+    h1 = (west & w) | (east & (west ^ w))
+
+    # the row above and below contribute all three, the middle row only two
+    a0, a1 = _north(h0), _north(h1)
+    b0, b1 = _south(h0), _south(h1)
+    m0, m1 = west ^ east, west & east
+
+    # a + b
+    x0 = a0 ^ b0
+    c0 = a0 & b0
+    x1 = a1 ^ b1 ^ c0
+    high = (a1 & b1) | (c0 & (a1 ^ b1))
+
+    # + m, only caring whether the total reaches 4
+    y0 = x0 ^ m0
+    d0 = x0 & m0
+    y1 = x1 ^ m1 ^ d0
+    high |= (x1 & m1) | (d0 & (x1 ^ m1))
+
+    # alive with 3 neighbors, or with 2 if already alive
+    return y1 & ~high & (y0 | w) & _mask(cols, w.shape[1])
+
+def step(board):
+    return from_words(step_words(to_words(board), board.shape[1]), board.shape[1])
+
+# setuptools entrypoint. Takes a grid, plays it with the bitboard engine
+# use like:
+#   cat grid.json | bitboard_life 1000
+# pass --packed to print the grid in the packed binary format
+def bitboard_life():
+
+    packed, args = packed_flag(sys.argv[1:])
+    generations = int(args[0])
+
+    board = load_board(sys.stdin.buffer.read())
+    cols = board.shape[1]
+
+    words = to_words(board)
+    for _ in range(generations):
+        words = step_words(words, cols)
+    board = from_words(words, cols)
+
+    if packed:
+        sys.stdout.buffer.write(pack_grid(board))
+    else:
+        print(json.dumps(array_to_grid(board), indent=2))
@@ -0,0 +1,74 @@
+import os
+import sys
+import hashlib
+from life.stage import load_board, pack_grid
+
+# identify a board by a digest of its packed form
+def digest(board):
+    return hashlib.sha1(pack_grid(board)).hexdigest()
+
+# maps the digest of every board seen so far to the tick where it first appeared
+# if given a directory, each digest is also stored there as a file containing
+# the tick, so separate processes (or pipeline nodes) can share the index
+class StateIndex:
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.ticks = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _lookup(self, key):
+        if key in self.ticks:
+            return self.ticks[key]
+        if self.directory and os.path.exists(self._path(key)):
+            with open(self._path(key)) as f:
+                tick = int(f.read())
+            self.ticks[key] = tick
+            return tick
+        return None
+
+    # the tick when this board was first seen, or None
+    def lookup(self, board):
+        return self._lookup(digest(board))
+
+    # remember a board, returns the earlier tick if this board is a repeat
+    def record(self, board, tick):
+        key = digest(board)
+        earlier = self._lookup(key)
+        if earlier is not None:
+            return earlier
+
+        self.ticks[key] = tick
+        if self.directory:
+            with open(self._path(key), 'w') as f:
+                f.write(str(tick))
+        return None
+
+    # name of the marker file written when a repeat is found
+    @property
+    def repeat_marker(self):
+        return self._path('repeat')
+
+# setuptools entrypoint. Takes a grid, records it in an index directory
+# if the grid was seen before, reports the cycle and leaves a 'repeat' marker
+# use like:
+#   cat grid.json | remember_grid 12 /conducto/data/pipeline/seen
+def remember_grid():
+
+    tick = int(sys.argv[1])
+    index = StateIndex(sys.argv[2])
+
+    board = load_board(sys.stdin.buffer.read())
+    earlier = index.record(board, tick)
+
+    if earlier is None:
+        print(f"tick {tick} is a new state")
+    else:
+        message = f"tick {tick} repeats tick {earlier}, period {tick - earlier}"
+        with open(index.repeat_marker, 'w') as f:
+            f.write(message)
+        print(message)
@@ -0,0 +1,84 @@
+import sys
+import json
+import struct
+import numpy as np
+from life.stage import (MAGIC, VERSION, DELTA, load_board, array_to_grid,
+                        pack_grid, packed_flag)
+
+# The cells that changed between two generations.
+#
+# Births and deaths are stored as flat cell indices (y * cols + x), so the
+# size of a delta follows the activity on the board rather than its area.
+# The header matches the packed boards in life.stage, with its own kind.
+delta_format = struct.Struct('<4sBBIIII')  # magic, version, kind, rows, cols, births, deaths
+
+# what changed from one board to the next, as (births, deaths)
+def diff(before, after):
+    births = np.flatnonzero((after == 1) & (before == 0)).astype(np.uint32)
+    deaths = np.flatnonzero((after == 0) & (before == 1)).astype(np.uint32)
+    return births, deaths
+
+# a copy of a board with a delta applied
+def apply(board, births, deaths):
+    board = board.copy()
+    flat = board.reshape(-1)
+    flat[births] = 1
+    flat[deaths] = 0
+    return board
+
+def pack_delta(shape, births, deaths):
+    rows, cols = shape
+    header = delta_format.pack(MAGIC, VERSION, DELTA, rows, cols,
+                               len(births), len(deaths))
+    return (header
+            + np.asarray(births, dtype='<u4').tobytes()
+            + np.asarray(deaths, dtype='<u4').tobytes())
+
+# returns (shape, births, deaths)
+def unpack_delta(in_bytes):
+
+    magic, version, kind, rows, cols, born, died = \
+        delta_format.unpack_from(in_bytes)
+    if magic != MAGIC or version != VERSION or kind != DELTA:
+        raise ValueError("not a packed delta")
+
+    cells = np.frombuffer(in_bytes, dtype='<u4', offset=delta_format.size)
+    if cells.size != born + died:
+        raise ValueError("truncated delta")
+    return (rows, cols), cells[:born], cells[born:]
+
+def read_delta(path):
+    with open(path, 'rb') as f:
+        return unpack_delta(f.read())
+
+# setuptools entrypoint, works with deltas between grids
+# use like:
+#   life_delta diff BEFORE AFTER > delta        # grids in any format
+#   cat grid.json | life_delta apply DELTA      # prints the next grid
+# pass --packed to print the grid in the packed binary format
+def life_delta():
+
+    packed, args = packed_flag(sys.argv[1:])
+    command = args[0]
+
+    if command == 'diff':
+        with open(args[1], 'rb') as f:
+            before = load_board(f.read())
+        with open(args[2], 'rb') as f:
+            after = load_board(f.read())
+        births, deaths = diff(before, after)
+        sys.stdout.buffer.write(pack_delta(before.shape, births, deaths))
+
+    elif command == 'apply':
+        board = load_board(sys.stdin.buffer.read())
+        shape, births, deaths = read_delta(args[1])
+        if shape != board.shape:
+            raise ValueError(f"delta for a {shape} board, got {board.shape}")
+        board = apply(board, births, deaths)
+        if packed:
+            sys.stdout.buffer.write(pack_grid(board))
+        else:
+            print(json.dumps(array_to_grid(board), indent=2))
+
+    else:
+        raise ValueError(f"unknown command: {command}")
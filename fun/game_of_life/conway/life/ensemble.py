@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import hashlib
+from multiprocessing import Pool
+import numpy as np
+from life.stage import CONWAY, compile_rule, apply_rule, rule_flag
+
+# Play many random soups at once.
+#
+# The boards are stacked into one (seed, y, x) array and stepped together.
+# Each seed remembers a digest of every state it has been in, and once a
+# state repeats, the seed has settled (into a still life or an oscillator)
+# and is dropped from the batch.  Like life.stage, cells beyond the edge of
+# each board are dead.
+
+# the same soup for the same seed, however the seeds are batched
+def random_soups(first_seed, count, rows, cols, density=0.5):
+    return np.stack([ (np.random.RandomState(seed).random_sample((rows, cols))
+                       < density).astype(np.uint8)
+                      for seed in range(first_seed, first_seed + count) ])
+
+# how many of each cell's eight neighbors are alive, for every board at once
+def count_neighbors_batch(boards):
+
+    n, rows, cols = boards.shape
+    padded = np.zeros((n, rows + 2, cols + 2), dtype=np.uint8)
+    padded[:, 1:-1, 1:-1] = boards
+
+    counts = np.zeros((n, rows, cols), dtype=np.uint8)
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if not (dy == dx == 1):
+                counts += padded[:, dy : dy + rows, dx : dx + cols]
+    return counts
+
+def step_batch(boards, rule=CONWAY):
+    return apply_rule(compile_rule(rule), boards, count_neighbors_batch(boards))
+
+# play every board until it settles or max_generations pass
+# returns one summary per board:
+#   lifespan    the generation where its final cycle starts (None if unsettled)
+#   period      1 for a still life, more for an oscillator (None if unsettled)
+#   population  live cells at the end
+def simulate(boards, max_generations=1000, rule=CONWAY):
+
+    count = boards.shape[0]
+    active = np.arange(count)
+    seen = [ {} for _ in range(count) ]
+    summaries = [ { 'lifespan'   : None,
+                    'period'     : None,
+                    'population' : None } for _ in range(count) ]
+
+    for generation in range(max_generations + 1):
+
+        # which boards have been here before?
+        settled = []
+        for position, index in enumerate(active.tolist()):
+            key = hashlib.sha1(boards[position].tobytes()).digest()
+            earlier = seen[index].get(key)
+            if earlier is None:
+                seen[index][key] = generation
+            else:
+                summaries[index].update(lifespan=earlier,
+                                        period=generation - earlier,
+                                        population=int(boards[position].sum()))
+                seen[index] = None  # done with it, free the memory
+                settled.append(position)
+
+        # drop them from the batch
+        if settled:
+            keep = np.ones(len(active), dtype=bool)
+            keep[settled] = False
+            active, boards = active[keep], boards[keep]
+
+        if not len(active) or generation == max_generations:
+            break
+        boards = step_batch(boards, rule)
+
+    for position, index in enumerate(active.tolist()):
+        summaries[index]['population'] = int(boards[position].sum())
+
+    return summaries
+
+def _survey_chunk(args):
+    first_seed, count, rows, cols, density, max_generations, rule = args
+    boards = random_soups(first_seed, count, rows, cols, density)
+    summaries = simulate(boards, max_generations, rule)
+    for seed, summary in enumerate(summaries, start=first_seed):
+        summary['seed'] = seed
+    return summaries
+
+# summaries for a range of seeds, split into chunks across a process pool
+def survey(first_seed, count, rows, cols, density=0.5, max_generations=1000,
+           processes=None, chunk=256, rule=CONWAY):
+
+    work = [ (start, min(chunk, first_seed + count - start), rows, cols,
+              density, max_generations, rule)
+             for start in range(first_seed, first_seed + count, chunk) ]
+
+    if processes == 1:
+        results = map(_survey_chunk, work)
+        return [ s for summaries in results for s in summaries ]
+
+    with Pool(processes) as pool:
+        results = pool.map(_survey_chunk, work)
+    return [ s for summaries in results for s in summaries ]
+
+# setuptools entrypoint, surveys random soups, prints one json summary per line
+# use like:
+#   life_ensemble FIRST_SEED COUNT SIDE [MAX_GENERATIONS] [PROCESSES]
+# pass --rule to play a different life-like rule, like --rule B36/S23
+def life_ensemble():
+
+    rule, args = rule_flag(sys.argv[1:])
+    first_seed, count, side = [ int(a) for a in args[0:3] ]
+    max_generations = int(args[3]) if len(args) > 3 else 1000
+    processes = int(args[4]) if len(args) > 4 else os.cpu_count()
+
+    for summary in survey(first_seed, count, side, side,
+                          max_generations=max_generations,
+                          processes=processes,
+                          rule=rule):
+        print(json.dumps(summary))
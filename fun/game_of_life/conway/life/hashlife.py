@@ -0,0 +1,343 @@
+import io
+import sys
+import json
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+from life.stage import (load_board, array_to_grid, packed_flag, pack_grid,
+                        pattern_format, read_macrocell, macrocell_leaf, CONWAY)
+
+# Hashlife: the universe is a quadtree of canonical nodes, and the future of
+# each node is memoized, so repetitive patterns can jump 2^k generations at
+# once.  Unlike the board engines in life.stage, the universe is unbounded:
+# cells beyond the edge of the starting grid are dead, but can come alive.
+#
+# Nodes are built through join(), whose cache doubles as the canonical node
+# table.  The caches are bounded, least recently used entries are evicted.
+# Evicting a node only costs us sharing, never correctness.
+
+cache_size = 1 << 19
+
+# k is the level (a node covers 2^k x 2^k cells), a b c d are the
+# nw, ne, sw and se quadrants, n is the population
+_Node = namedtuple('_Node', 'k a b c d n hash')
+
+class Node(_Node):
+
+    __slots__ = ()
+
+    # nodes are canonical, so compare by identity instead of walking the tree
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, other):
+        return self is other
+
+    def __ne__(self, other):
+        return self is not other
+
+    def __repr__(self):
+        return f"Node(k={self.k}, n={self.n})"
+
+on = Node(0, None, None, None, None, 1, 1)
+off = Node(0, None, None, None, None, 0, 0)
+
+# the canonical node with these four quadrants
+@lru_cache(maxsize=cache_size)
+def join(a, b, c, d):
+    n = a.n + b.n + c.n + d.n
+    nhash = (a.k + 2
+             + 5131830419411 * a.hash
+             + 3758991985019 * b.hash
+             + 8973110871315 * c.hash
+             + 4318490180473 * d.hash) & ((1 << 63) - 1)
+    return Node(a.k + 1, a, b, c, d, n, nhash)
+
+# an empty node of level k
+@lru_cache(maxsize=256)
+def empty(k):
+    if k == 0:
+        return off
+    e = empty(k - 1)
+    return join(e, e, e, e)
+
+# a node one level up, with m in the middle
+def centre(m):
+    e = empty(m.k - 1)
+    return join(join(e, e, e, m.a),
+                join(e, e, m.b, e),
+                join(e, m.c, e, e),
+                join(m.d, e, e, e))
+
+# the middle of m, one level down
+def middle(m):
+    return join(m.a.d, m.b.c, m.c.b, m.d.a)
+
+# the next state of a cell, given its eight neighbors and itself (e)
+def _rule(a, b, c, d, e, f, g, h, i):
+    outer = a.n + b.n + c.n + d.n + f.n + g.n + h.n + i.n
+    if outer == 3 or (e.n and outer == 2):
+        return on
+    return off
+
+# the middle 2x2 of a 4x4 node, one generation on
+def _life_4x4(m):
+    nw = _rule(m.a.a, m.a.b, m.b.a, m.a.c, m.a.d, m.b.c, m.c.a, m.c.b, m.d.a)
+    ne = _rule(m.a.b, m.b.a, m.b.b, m.a.d, m.b.c, m.b.d, m.c.b, m.d.a, m.d.b)
+    sw = _rule(m.a.c, m.a.d, m.b.c, m.c.a, m.c.b, m.d.a, m.c.c, m.c.d, m.d.c)
+    se = _rule(m.a.d, m.b.c, m.b.d, m.c.b, m.d.a, m.d.b, m.c.d, m.d.c, m.d.d)
+    return join(nw, ne, sw, se)
+
+# the middle of m (one level down), 2^j generations on
+# j defaults to (and is capped at) m.k - 2, the furthest a node can see
+@lru_cache(maxsize=cache_size)
+def successor(m, j=None):
+
+    if m.n == 0:
+        return m.a
+
+    if m.k == 2:
+        return _life_4x4(m)
+
+    if j is None or j > m.k - 2:
+        j = m.k - 2
+
+    # nine overlapping sub-squares, each advanced up to half way
+    c1 = successor(join(m.a.a, m.a.b, m.a.c, m.a.d), j)
+    c2 = successor(join(m.a.b, m.b.a, m.a.d, m.b.c), j)
+    c3 = successor(join(m.b.a, m.b.b, m.b.c, m.b.d), j)
+    c4 = successor(join(m.a.c, m.a.d, m.c.a, m.c.b), j)
+    c5 = successor(join(m.a.d, m.b.c, m.c.b, m.d.a), j)
+    c6 = successor(join(m.b.c, m.b.d, m.d.a, m.d.b), j)
+    c7 = successor(join(m.c.a, m.c.b, m.c.c, m.c.d), j)
+    c8 = successor(join(m.c.b, m.d.a, m.c.d, m.d.c), j)
+    c9 = successor(join(m.d.a, m.d.b, m.d.c, m.d.d), j)
+
+    if j < m.k - 2:
+        # already far enough, just take the middles
+        return join(join(c1.d, c2.c, c4.b, c5.a),
+                    join(c2.d, c3.c, c5.b, c6.a),
+                    join(c4.d, c5.c, c7.b, c8.a),
+                    join(c5.d, c6.c, c8.b, c9.a))
+
+    # advance the other half of the way
+    return join(successor(join(c1, c2, c4, c5), j),
+                successor(join(c2, c3, c5, c6), j),
+                successor(join(c4, c5, c7, c8), j),
+                successor(join(c5, c6, c8, c9), j))
+
+def clear_caches():
+    join.cache_clear()
+    empty.cache_clear()
+    successor.cache_clear()
+
+# the node for a square of a board, of level k, with its top left at (y, x)
+def _build(board, y, x, k):
+    if k == 0:
+        return on if board[y, x] else off
+    size = 1 << k
+    if not board[y : y + size, x : x + size].any():
+        return empty(k)
+    half = size >> 1
+    return join(_build(board, y,        x,        k - 1),
+                _build(board, y,        x + half, k - 1),
+                _build(board, y + half, x,        k - 1),
+                _build(board, y + half, x + half, k - 1))
+
+# a node and the coordinates of its top left corner
+class Universe:
+
+    def __init__(self, node, x=0, y=0):
+        self.node = node
+        self.x = x
+        self.y = y
+
+    @classmethod
+    def from_array(cls, board):
+
+        rows, cols = board.shape
+        k = 2
+        while (1 << k) < max(rows, cols):
+            k += 1
+
+        padded = np.zeros((1 << k, 1 << k), dtype=np.uint8)
+        padded[:rows, :cols] = board
+
+        return cls(_build(padded, 0, 0, k))
+
+    # read a Macrocell pattern (see life.stage) straight into nodes, without
+    # ever expanding it into a board
+    @classmethod
+    def from_macrocell(cls, lines):
+        return cls(read_macrocell(lines,
+                                  leaf=lambda cells: _build(cells, 0, 0, 3),
+                                  join=lambda k, a, b, c, d: join(a, b, c, d),
+                                  empty=empty))
+
+    # write the universe as a Macrocell pattern, one line per distinct node
+    def write_macrocell(self, out, rule=CONWAY):
+
+        m = self.node
+        while m.k < 3:
+            m = centre(m)
+
+        out.write(f"[M2] (life)\n#R {rule}\n")
+
+        numbers = {}
+        def number(m):
+            if m.n == 0:
+                return 0
+            if m not in numbers:
+                if m.k == 3:
+                    line = macrocell_leaf(Universe(m).to_array(0, 0, 8, 8))
+                else:
+                    line = f"{m.k} {number(m.a)} {number(m.b)} {number(m.c)} {number(m.d)}"
+                numbers[m] = len(numbers) + 1
+                out.write(line + '\n')
+            return numbers[m]
+
+        if not number(m):
+            out.write('$\n')
+
+    @property
+    def population(self):
+        return self.node.n
+
+    def _centre(self):
+        offset = 1 << (self.node.k - 1)
+        self.node = centre(self.node)
+        self.x -= offset
+        self.y -= offset
+
+    # drop empty borders, so the tree doesn't keep growing
+    def _crop(self):
+        m = self.node
+        while m.k > 2:
+            inner = middle(m)
+            if inner.n != m.n:
+                break
+            offset = 1 << (m.k - 2)
+            self.x += offset
+            self.y += offset
+            m = inner
+        self.node = m
+
+    # one jump of 2^j generations
+    def _jump(self, j):
+
+        # big enough to hold the jump, with room for the pattern to grow
+        while self.node.k < j + 1:
+            self._centre()
+        self._centre()
+        self._centre()
+
+        offset = 1 << (self.node.k - 2)
+        self.node = successor(self.node, j)
+        self.x += offset
+        self.y += offset
+        self._crop()
+
+    # move forward any number of generations, biggest jumps first
+    def advance(self, generations):
+        j = generations.bit_length()
+        while j >= 0:
+            if generations & (1 << j):
+                self._jump(j)
+            j -= 1
+        return self
+
+    # the live cells within a window, as a board
+    def to_array(self, x, y, rows, cols):
+
+        board = np.zeros((rows, cols), dtype=np.uint8)
+
+        def fill(m, mx, my):
+            size = 1 << m.k
+            if (m.n == 0
+                    or mx >= x + cols or my >= y + rows
+                    or mx + size <= x or my + size <= y):
+                return
+            if m.k == 0:
+                board[my - y, mx - x] = 1
+                return
+            half = size >> 1
+            fill(m.a, mx,        my)
+            fill(m.b, mx + half, my)
+            fill(m.c, mx,        my + half)
+            fill(m.d, mx + half, my + half)
+
+        fill(self.node, self.x, self.y)
+        return board
+
+    # the smallest window containing every live cell, as (x, y, rows, cols)
+    def bounds(self):
+
+        if self.node.n == 0:
+            return (0, 0, 0, 0)
+
+        # the same descent as to_array, keeping only the extremes
+        found = [None, None, None, None]  # min x, min y, max x, max y
+
+        def visit(m, mx, my):
+            if m.n == 0:
+                return
+            if m.k == 0:
+                found[0] = mx if found[0] is None else min(found[0], mx)
+                found[1] = my if found[1] is None else min(found[1], my)
+                found[2] = mx if found[2] is None else max(found[2], mx)
+                found[3] = my if found[3] is None else max(found[3], my)
+                return
+            half = 1 << (m.k - 1)
+            visit(m.a, mx,        my)
+            visit(m.b, mx + half, my)
+            visit(m.c, mx,        my + half)
+            visit(m.d, mx + half, my + half)
+
+        visit(self.node, self.x, self.y)
+        min_x, min_y, max_x, max_y = found
+        return (min_x, min_y, max_y - min_y + 1, max_x - min_x + 1)
+
+# advance a board, returning the same window of the (unbounded) universe
+def advance_array(board, generations):
+    rows, cols = board.shape
+    universe = Universe.from_array(board).advance(generations)
+    return universe.to_array(0, 0, rows, cols)
+
+# setuptools entrypoint. Takes a grid, jumps ahead with Hashlife
+# prints the same window as the input, or with --fit, a window around every
+# live cell.  Pass --packed for the packed binary format.
+# Macrocell patterns are read without expanding them, and with --macrocell
+# the result is written as one too, so huge patterns never become boards.
+# use like:
+#   cat grid.json | hashlife 1000000
+#   cat breeder.mc | hashlife 1000000 --macrocell
+def hashlife():
+
+    packed, args = packed_flag(sys.argv[1:])
+    fit = '--fit' in args
+    macrocell = '--macrocell' in args
+    args = [ a for a in args if a not in ('--fit', '--macrocell') ]
+    generations = int(args[0])
+
+    in_bytes = sys.stdin.buffer.read()
+    if pattern_format(in_bytes[:64].decode(errors='ignore')) == 'mc':
+        universe = Universe.from_macrocell(io.StringIO(in_bytes.decode()))
+        fit = True  # a macrocell has no window of its own
+    else:
+        board = load_board(in_bytes)
+        universe = Universe.from_array(board)
+
+    universe.advance(generations)
+    if macrocell:
+        universe.write_macrocell(sys.stdout)
+        return
+
+    if fit:
+        out = universe.to_array(*universe.bounds())
+    else:
+        out = universe.to_array(0, 0, *board.shape)
+
+    if packed:
+        sys.stdout.buffer.write(pack_grid(out))
+    else:
+        print(json.dumps(array_to_grid(out), indent=2))
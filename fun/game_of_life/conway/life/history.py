@@ -0,0 +1,123 @@
+import io
+import os
+import sys
+import json
+import struct
+from life.stage import (load_board, array_to_grid, pack_grid, read_packed,
+                        iter_packed, is_packed, packed_flag)
+
+# An append-only history of grids.
+#
+# The grids are packed records appended to one file, and a second file (the
+# same name plus '.index') holds the offset of each record as a little endian
+# uint64.  Appending writes one record and one offset, and reading any tick,
+# including the latest, is one seek into each file.
+offset_format = struct.Struct('<Q')
+
+class History:
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + '.index'
+
+    def __len__(self):
+        if not os.path.exists(self.index_path):
+            return 0
+        return os.path.getsize(self.index_path) // offset_format.size
+
+    # add a board, returns its tick
+    def append(self, board):
+
+        record = pack_grid(board)
+        with open(self.path, 'ab') as data:
+            offset = data.seek(0, os.SEEK_END)
+            data.write(record)
+
+        # the index is written last, so a reader never sees a partial record
+        with open(self.index_path, 'ab') as index:
+            index.write(offset_format.pack(offset))
+
+        return len(self) - 1
+
+    def _offset(self, tick):
+
+        count = len(self)
+        if tick < 0:
+            tick += count
+        if not 0 <= tick < count:
+            raise IndexError(f"tick {tick} not in a history of {count} grids")
+
+        with open(self.index_path, 'rb') as index:
+            index.seek(tick * offset_format.size)
+            offset, = offset_format.unpack(index.read(offset_format.size))
+        return offset
+
+    # the board at some tick, negative ticks count back from the latest
+    def get(self, tick):
+        with open(self.path, 'rb') as data:
+            data.seek(self._offset(tick))
+            board, _ = read_packed(data)
+        return board
+
+    def __getitem__(self, tick):
+        return self.get(tick)
+
+    def latest(self):
+        return self.get(-1)
+
+    # every board from some tick on, read one at a time
+    def boards(self, start=0):
+        if start >= len(self):
+            return
+        with open(self.path, 'rb') as data:
+            data.seek(self._offset(start))
+            for board, _ in iter_packed(data):
+                yield board
+
+# setuptools entrypoint, reads and appends to a grid history
+# use like:
+#   cat grid.json | life_history append HISTORY   # or a stream of packed grids
+#   life_history latest HISTORY
+#   life_history get HISTORY TICK
+#   life_history count HISTORY
+#   life_history frames HISTORY [START]            # one grid per line
+# pass --packed to print grids in the packed binary format
+def life_history():
+
+    packed, args = packed_flag(sys.argv[1:])
+    command, history = args[0], History(args[1])
+
+    def emit(board):
+        if packed:
+            sys.stdout.buffer.write(pack_grid(board))
+        else:
+            print(json.dumps(array_to_grid(board), indent=2))
+
+    if command == 'append':
+        in_bytes = sys.stdin.buffer.read()
+        if is_packed(in_bytes):
+            boards = [ board for board, _ in iter_packed(io.BytesIO(in_bytes)) ]
+        else:
+            boards = [ load_board(in_bytes) ]
+        for board in boards:
+            print(history.append(board))
+
+    elif command == 'latest':
+        emit(history.latest())
+
+    elif command == 'get':
+        emit(history.get(int(args[2])))
+
+    elif command == 'count':
+        print(len(history))
+
+    elif command == 'frames':
+        start = int(args[2]) if len(args) > 2 else 0
+        for board in history.boards(start):
+            if packed:
+                sys.stdout.buffer.write(pack_grid(board))
+            else:
+                print(json.dumps(array_to_grid(board)))
+
+    else:
+        raise ValueError(f"unknown command: {command}")
@@ -0,0 +1,89 @@
+import io
+import os
+import sys
+from multiprocessing import Pool
+from life.cycles import digest
+from life.history import History
+from life.show import image_from_board
+
+# Render many frames at once, off the critical path of the simulation.
+#
+# Frames are unnumbered, so identical grids make identical frames: each one
+# is stored once, named after the digest of its grid (see life.cycles), and
+# an oscillator's repeats cost nothing to draw again.  The directory can be
+# shared by several processes, or pipeline nodes.
+class FrameCache:
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def name(self, key):
+        return key + '.png'
+
+    def path(self, key):
+        return os.path.join(self.directory, self.name(key))
+
+    def __contains__(self, key):
+        return os.path.exists(self.path(key))
+
+    def get(self, key):
+        with open(self.path(key), 'rb') as f:
+            return f.read()
+
+    def put(self, key, png):
+
+        # write it aside and rename it into place, so a reader never sees half
+        # a frame, even if another process is storing the same one
+        temp = f"{self.path(key)}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(png)
+        os.replace(temp, self.path(key))
+
+def png_bytes(board):
+    out = io.BytesIO()
+    image_from_board(board).save(out, format='PNG')
+    return out.getvalue()
+
+def _encode(item):
+    key, board = item
+    return key, png_bytes(board)
+
+# make sure every board has a frame in the cache
+# returns the name of each board's frame, in order
+def render(boards, cache, processes=None):
+
+    names = []
+    missing = {}
+    for board in boards:
+        key = digest(board)
+        names.append(cache.name(key))
+        if key not in missing and key not in cache:
+            missing[key] = board
+
+    if len(missing) > 1 and processes != 1:
+        with Pool(processes) as pool:
+            for key, png in pool.imap_unordered(_encode, missing.items()):
+                cache.put(key, png)
+    else:
+        for key, png in map(_encode, missing.items()):
+            cache.put(key, png)
+
+    return names
+
+# setuptools entrypoint, renders a range of ticks from a history
+# (see life.history) into a directory of frames, prints each tick with the
+# name of its frame
+# use like:
+#   life_render HISTORY FRAMES_DIR [START [STOP]] [PROCESSES]
+def life_render():
+
+    history = History(sys.argv[1])
+    cache = FrameCache(sys.argv[2])
+    start = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    stop = int(sys.argv[4]) if len(sys.argv) > 4 else len(history)
+    processes = int(sys.argv[5]) if len(sys.argv) > 5 else None
+
+    boards = [ board for _, board in zip(range(start, stop), history.boards(start)) ]
+    for tick, name in enumerate(render(boards, cache, processes), start=start):
+        print(tick, name)
@@ -0,0 +1,108 @@
+import os
+import sys
+import json
+import numpy as np
+from life.stage import (count_neighbors, unpack, is_packed, load_board, CONWAY,
+                        parse_rule, compile_rule, rule_flag)
+from life.delta import pack_delta
+
+# every cell falls under exactly one rule
+ISOLATE, SURVIVE, CROWD, REPRODUCE, IGNORE = range(5)
+rule_names = ('isolate', 'survive', 'crowd', 'reproduce', 'ignore')
+
+# which rule applies to each cell, in one pass over the whole board
+# a live cell that dies is isolated if it has fewer neighbors than any count
+# that lets it survive, otherwise it is crowded
+def classify(board, counts=None, rule=CONWAY):
+
+    if counts is None:
+        counts = count_neighbors(board)
+
+    table = compile_rule(rule)
+    fewest = min(parse_rule(rule)[1], default=9)
+
+    alive = board == 1
+    return np.select([ alive & (table[1][counts] == 1),
+                       alive & (counts < fewest),
+                       alive,
+                       table[0][counts] == 1 ],
+                     [ SURVIVE, ISOLATE, CROWD, REPRODUCE ],
+                     default=IGNORE).astype(np.uint8)
+
+# the board after the rules are applied
+def outcome(buckets):
+    return ((buckets == SURVIVE) | (buckets == REPRODUCE)).astype(np.uint8)
+
+# the cells that change, as (births, deaths) like life.delta.diff
+def changes(buckets):
+    births = np.flatnonzero(buckets == REPRODUCE).astype(np.uint32)
+    deaths = np.flatnonzero((buckets == ISOLATE) | (buckets == CROWD)).astype(np.uint32)
+    return births, deaths
+
+# how many cells fall under each rule
+def tally(buckets):
+    totals = np.bincount(buckets.ravel(), minlength=len(rule_names))
+    return { name : int(total) for name, total in zip(rule_names, totals) }
+
+# the cells under one rule, like the neighborhoods from as_neighborhoods
+# but with 'alive' showing the outcome
+# limit keeps just the first few, in reading order
+def cells_for(rule, buckets, board, counts, limit=None):
+
+    ys, xs = np.nonzero(buckets == rule)
+    ys, xs = ys[:limit], xs[:limit]
+    alive = rule in (SURVIVE, REPRODUCE)
+    return [ { 'x'         : x,
+               'y'         : y,
+               'alive'     : alive,
+               'neighbors' : n }
+             for x, y, n in zip(xs.tolist(), ys.tolist(), counts[ys, xs].tolist()) ]
+
+# setuptools entrypoint. Takes neighborhoods (or a grid), applies every rule
+# writes the delta to the next grid (see life.delta) and the per-rule counts
+# to a directory, and with --cells, the cells under each rule to a json file
+# named after the rule
+# the full lists are about as big as the board, so --sample N writes just the
+# first N cells under each rule instead, skipping 'ignore'
+# pass --rule to play a different life-like rule, like --rule B36/S23
+# use like:
+#   cat neighborhoods | apply_rules rules_07 --cells
+#   cat neighborhoods | apply_rules rules_07 --sample 10
+def apply_rules():
+
+    rule, args = rule_flag(sys.argv[1:])
+    cells = '--cells' in args
+    args = [ a for a in args if a != '--cells' ]
+    sample = None
+    if '--sample' in args:
+        at = args.index('--sample')
+        sample = int(args[at + 1])
+        del args[at : at + 2]
+    directory = args[0]
+
+    in_bytes = sys.stdin.buffer.read()
+    counts = None
+    if is_packed(in_bytes):
+        board, counts = unpack(in_bytes)
+    else:
+        board = load_board(in_bytes)
+    if counts is None:
+        counts = count_neighbors(board)
+
+    buckets = classify(board, counts, rule)
+    totals = tally(buckets)
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'delta'), 'wb') as f:
+        f.write(pack_delta(board.shape, *changes(buckets)))
+    with open(os.path.join(directory, 'counts.json'), 'w') as f:
+        json.dump(totals, f, indent=2)
+
+    if cells or sample is not None:
+        for rule, name in enumerate(rule_names):
+            if not cells and rule == IGNORE:
+                continue
+            with open(os.path.join(directory, name), 'w') as f:
+                json.dump(cells_for(rule, buckets, board, counts, limit=sample), f, indent=2)
+
+    print(json.dumps(totals, indent=2))
@@ -0,0 +1,48 @@
+import sys
+import json
+from life.stage import (load_board, array_to_grid, step, packed_flag, rule_flag,
+                        pack_grid, IncrementalStepper, CONWAY)
+
+# setuptools entrypoint. Takes a grid, plays many generations in one process
+# prints a list with every Kth grid (default: every grid)
+# pass --packed to print a stream of packed grids instead
+# pass --incremental to only recompute the parts of the board that are changing
+# pass --rule to play a different life-like rule, like --rule B36/S23
+# use like:
+#   cat grid.json | life_run 100 10
+def life_run():
+
+    packed, args = packed_flag(sys.argv[1:])
+    rule, args = rule_flag(args)
+    incremental = '--incremental' in args
+    args = [ a for a in args if a != '--incremental' ]
+    generations = int(args[0])
+    if len(args) > 1:
+        every = int(args[1])
+    else:
+        every = 1
+
+    board = load_board(sys.stdin.buffer.read())
+    states = run(board, generations, every, incremental=incremental, rule=rule)
+
+    if packed:
+        for state in states:
+            sys.stdout.buffer.write(pack_grid(state))
+    else:
+        print(json.dumps([ array_to_grid(b) for b in states ], indent=2))
+
+# advance a board, yielding generations every, 2*every, ... up to generations
+def run(board, generations, every=1, incremental=False, rule=CONWAY):
+
+    if every < 1:
+        raise ValueError("every must be at least 1")
+
+    if incremental:
+        advance = IncrementalStepper(board, rule=rule).step
+    else:
+        advance = lambda: step(board, rule)
+
+    for generation in range(1, generations + 1):
+        board = advance()
+        if generation % every == 0:
+            yield board
@@ -1,7 +1,7 @@
 import sys
-import pytest
-import json
-from PIL import Image, ImageDraw, ImageFont
+from functools import lru_cache
+import numpy as np
+from life.stage import load_board, grid_to_array
 
 # some parameters for image creation
 color = {
@@ -12,59 +12,164 @@ bg = (69, 63, 86)
 text = (149, 255, 66)
 cell_size = 15
 border_size = 15
+font_path = "/usr/share/fonts/ttf-liberation/LiberationMono-Bold.ttf"
+
+# images are never bigger than this on either side, in pixels
+max_size = 4096
+
+# images are drawn with a palette, these are the indices
+BG, DEAD, ALIVE, TEXT = range(4)
+palette = [ *bg, *color["0"], *color["1"], *text ]
+
+# when there are more cells than pixels, each pixel shows the live fraction
+# of a block of cells, on a ramp of shades from dead to alive
+shades = 16
+RAMP = len(palette) // 3
+palette += [ round(d + (a - d) * i / (shades - 1))
+             for i in range(shades)
+             for d, a in zip(color["0"], color["1"]) ]
+
+# Pillow is imported where it's used, so that importing this module stays cheap
+
+# load the font once per process
+@lru_cache(maxsize=None)
+def get_font(size):
+    from PIL import ImageFont
+    return ImageFont.truetype(font_path, size)
+
+# how to fit a board within max_size, as (pixels per cell, cells per pixel)
+# cells shrink from cell_size down to a single pixel, then blocks of cells
+# share a pixel
+def scale_for(shape):
+
+    room = max_size - 2 * border_size
+    side = max(max(shape, default=0), 1)
+
+    if side * cell_size <= room:
+        return cell_size, 1
+    if side <= room:
+        return room // side, 1
+    return 1, -(-side // room)
+
+# the live fraction of each block x block square of cells
+# squares at the edges may be partial, they count only the cells they have
+def density(board, block):
+
+    rows, cols = board.shape
+    brows, bcols = -(-rows // block), -(-cols // block)
+
+    def block_sums(a):
+        padded = np.zeros((brows * block, bcols * block), dtype=np.uint8)
+        padded[:rows, :cols] = a
+        return padded.reshape(brows, block, bcols, block).sum(axis=(1, 3), dtype=np.uint32)
+
+    sizes = np.outer(np.diff(np.minimum(np.arange(brows + 1) * block, rows)),
+                     np.diff(np.minimum(np.arange(bcols + 1) * block, cols)))
+    return block_sums(board) / sizes
 
 # make an image of the given grid
 # put a number in the upper left corner to indicate which iteration
 def image_from_grid(grid, number=None):
+    return image_from_board(grid_to_array(grid), number=number)
 
-    side = len(grid)
-    side_px = cell_size * side + 2*border_size
-    image = Image.new('RGB', (side_px, side_px), color=bg)
-    canvas = image.load()
+# same, for a board from life.stage
+# scale is (pixels per cell, cells per pixel), by default from scale_for
+def image_from_board(board, number=None, scale=None):
 
-    # for each cell
-    for y, row in enumerate(grid):
-        for x, cell in enumerate(row):
+    from PIL import Image, ImageDraw
 
-            # for each pixel in that cell
-            for i in range(cell_size):
-                for j in range(cell_size):
+    cell, block = scale or scale_for(board.shape)
 
-                    # color based on aliveness
-                    canvas[border_size + x * cell_size + i,
-                           border_size + y * cell_size + j] = color[cell]
+    # one palette index per cell (or block of cells), then scale each one up
+    # to a square of pixels
+    if block == 1:
+        cells = np.where(board, ALIVE, DEAD).astype(np.uint8)
+    else:
+        shade = np.rint(density(board, block) * (shades - 1)).astype(np.uint8)
+        cells = RAMP + shade
+    pixels = cells.repeat(cell, axis=0).repeat(cell, axis=1)
+    pixels = np.pad(pixels, border_size, constant_values=BG)
+
+    image = Image.fromarray(pixels, mode='P')
+    image.putpalette(palette)
 
     # number this image
     if number or number == 0:
         draw = ImageDraw.Draw(image)
-        font = ImageFont.truetype("/usr/share/fonts/ttf-liberation/LiberationMono-Bold.ttf", cell_size)
         location = (0,0)
-        draw.text(location, str(number), text, font=font)
+        draw.text(location, str(number), TEXT, font=get_font(cell_size))
 
     return image
 
-def test_image_from_grid():
-    image = image_from_grid(['101','010','101'])
-    image.save('show.py.testimage.png')
+# update the image of a previous frame in place
+# only the changed cells (flat indices, see life.delta) and the number are redrawn
+# boards drawn in blocks of cells get a new image instead
+def redraw(image, board, births, deaths, number=None):
+
+    from PIL import ImageDraw
+
+    cell, block = scale = scale_for(board.shape)
+    if block > 1:
+        return image_from_board(board, number=number)
 
-def test_image_from_grid_with_number():
-    image = image_from_grid(['1011','0101','1011','1100'], number=17)
-    image.save('show.py.testimage.number.png')
+    cols = board.shape[1]
+    draw = ImageDraw.Draw(image)
+
+    for cells, fill in ((births, ALIVE), (deaths, DEAD)):
+        for index in np.asarray(cells).tolist():
+            y, x = divmod(index, cols)
+            left = border_size + x * cell
+            top = border_size + y * cell
+            draw.rectangle([left, top, left + cell - 1, top + cell - 1],
+                           fill=fill)
+
+    # erase the old number: the strip it was drawn on, and any cells it overlapped
+    if number or number == 0:
+        font = get_font(cell_size)
+        strip = draw.textbbox((0, 0), "0123456789", font=font)[3]
+        draw.rectangle([0, 0, image.size[0] - 1, strip], fill=BG)
 
+        if strip >= border_size:
+            covered = (strip - border_size) // cell + 1
+            top = image_from_board(board[:covered], scale=scale)
+            image.paste(top.crop((0, border_size, image.size[0], strip + 1)),
+                        (0, border_size))
+
+        draw.text((0, 0), str(number), TEXT, font=font)
+
+    return image
 
 # setuptools entrypoint, makes a still frame of a grid
 # use like:
 #   echo '["10","01"] | picture outfile.png 2
+# the grid may also be in the packed binary format
+# to only redraw the cells that changed since a previous frame:
+#   cat grid.json | to_png outfile.png 3 --base previous.png --delta delta
 def to_png():
 
+    args = sys.argv[1:]
+    options = {}
+    for flag in ('--base', '--delta'):
+        if flag in args:
+            at = args.index(flag)
+            options[flag] = args[at + 1]
+            del args[at : at + 2]
+
     # the file to write
-    filename = sys.argv[1]
+    filename = args[0]
 
     # annotate the image with this number
-    number = int(sys.argv[2])
+    number = int(args[1])
 
     # read grid from stdin
-    grid = json.loads(sys.stdin.read())
-
-    image = image_from_grid(grid, number=number)
+    board = load_board(sys.stdin.buffer.read())
+
+    if '--base' in options and '--delta' in options:
+        from life.delta import read_delta
+        shape, births, deaths = read_delta(options['--delta'])
+        from PIL import Image
+        image = redraw(Image.open(options['--base']), board, births, deaths,
+                       number=number)
+    else:
+        image = image_from_board(board, number=number)
     image.save(filename)
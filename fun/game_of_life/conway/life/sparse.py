@@ -0,0 +1,95 @@
+import sys
+import json
+import numpy as np
+from life.stage import load_board, array_to_grid, packed_flag, pack_grid
+
+# a sparse universe is a sorted array of keys, one per live cell
+# memory grows with the population instead of the area of the board
+# and coordinates are unbounded (well, 32 bits each way)
+#
+# key = y * 2^32 + x, so sorting keys sorts cells row by row, and the
+# neighbors of a cell are a constant offset away from its key
+
+_shift = 32
+_half = 1 << (_shift - 1)
+_mask = (1 << _shift) - 1
+
+_offsets = np.array([ (dy << _shift) + dx
+                      for dy in (-1, 0, 1)
+                      for dx in (-1, 0, 1)
+                      if not (dy == dx == 0) ], dtype=np.int64)
+
+def encode(xs, ys):
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    return np.unique((ys << _shift) + xs)
+
+def decode(keys):
+    xs = ((keys + _half) & _mask) - _half
+    ys = (keys - xs) >> _shift
+    return xs, ys
+
+# live cells of a board, with its top left corner at (x, y)
+def from_array(board, x=0, y=0):
+    ys, xs = np.nonzero(board)
+    return encode(xs + x, ys + y)
+
+# live cells within a window, as a board
+def to_array(keys, x, y, rows, cols):
+    board = np.zeros((rows, cols), dtype=np.uint8)
+    xs, ys = decode(keys)
+    inside = (xs >= x) & (xs < x + cols) & (ys >= y) & (ys < y + rows)
+    board[ys[inside] - y, xs[inside] - x] = 1
+    return board
+
+# the smallest window containing every live cell, as (x, y, rows, cols)
+def bounds(keys):
+    if keys.size == 0:
+        return (0, 0, 0, 0)
+    xs, ys = decode(keys)
+    return (int(xs.min()), int(ys.min()),
+            int(ys.max() - ys.min() + 1), int(xs.max() - xs.min() + 1))
+
+# advance a universe by one generation
+def step(keys):
+
+    # every neighbor of every live cell is a candidate, counted once per
+    # live neighbor
+    candidates = (keys[:, np.newaxis] + _offsets).ravel()
+    cells, counts = np.unique(candidates, return_counts=True)
+
+    # both arrays are sorted, so membership is a binary search
+    where = np.searchsorted(keys, cells)
+    alive = where < keys.size
+    alive[alive] = keys[where[alive]] == cells[alive]
+
+    return cells[(counts == 3) | (alive & (counts == 2))]
+
+# setuptools entrypoint. Takes a grid, plays it on an unbounded sparse universe
+# prints the same window as the input, or with --fit, a window around every
+# live cell.  Pass --packed for the packed binary format.
+# use like:
+#   cat grid.json | sparse_life 500 --fit
+def sparse_life():
+
+    packed, args = packed_flag(sys.argv[1:])
+    fit = '--fit' in args
+    args = [ a for a in args if a != '--fit' ]
+    generations = int(args[0])
+
+    board = load_board(sys.stdin.buffer.read())
+    rows, cols = board.shape
+
+    keys = from_array(board)
+    for _ in range(generations):
+        keys = step(keys)
+
+    if fit:
+        out = to_array(keys, *bounds(keys))
+    else:
+        out = to_array(keys, 0, 0, rows, cols)
+
+    if packed:
+        sys.stdout.buffer.write(pack_grid(out))
+    else:
+        print(json.dumps(array_to_grid(out), indent=2))
@@ -1,55 +1,46 @@
+import io
 import sys
+import itertools
+import functools
 import json
 import math
-import pytest
-from collections import namedtuple
+import re
+import struct
+import numpy as np
 
 # setuptools entrypoint. Takes a string, prints a grid
-# detects input as either a json neighbor list or a raw string with 0's and 1's
+# detects input as either a json neighbor list, a packed grid or neighborhoods,
+# a pattern file (RLE, .cells or Macrocell), or a raw string with 0's and 1's
+# pass --packed to print the grid in the packed binary format
+# or --to rle, --to cells or --to mc to print it as a pattern file
 def to_grid():
 
-    if len(sys.argv) > 1:
-        in_str = sys.argv[1]
+    packed, args = packed_flag(sys.argv[1:])
+    fmt = None
+    if '--to' in args:
+        at = args.index('--to')
+        fmt = args[at + 1]
+        del args[at : at + 2]
+        if fmt not in pattern_writers:
+            raise ValueError(f"unknown pattern format: {fmt}")
+
+    if args:
+        in_bytes = args[0].encode()
     else:
-        in_str = sys.stdin.read()
+        in_bytes = sys.stdin.buffer.read()
 
-    out_str = input_to_grid(in_str)
-    print(json.dumps(out_str, indent=2))
-
-# input as defined by user
-def test_to_grid_str():
-    in_str = '''101
-                001
-                111'''
-
-    out = ['101',
-           '001',
-           '111']
-    assert input_to_grid(in_str) == out
-
-# input as filtered by rules
-def test_to_grid_neighbors():
-
-    in_str = json.dumps([{ 'x'     : 0,
-                           'y'     : 0,
-                           'alive' : False },
-
-                         { 'x'     : 1,
-                           'y'     : 0,
-                           'alive' : False },
-
-                         { 'x'     : 0,
-                           'y'     : 1,
-                           'alive' : True },
-
-                         { 'x'     : 1,
-                           'y'     : 1,
-                           'alive' : True }])
-
-    out = ['00',
-           '11']
+    if is_packed(in_bytes):
+        board, _ = unpack(in_bytes)
+        out_grid = array_to_grid(board)
+    else:
+        out_grid = input_to_grid(in_bytes.decode())
 
-    assert input_to_grid(in_str) == out
+    if packed:
+        sys.stdout.buffer.write(pack_grid(grid_to_array(out_grid)))
+    elif fmt:
+        pattern_writers[fmt](grid_to_array(out_grid), sys.stdout)
+    else:
+        print(json.dumps(out_grid, indent=2))
 
 # normalize input to a grid
 # tolerate multiple input types
@@ -57,7 +48,12 @@ def input_to_grid(in_str):
 
     output = []
 
-    if '[' in in_str and '{' in in_str:
+    board = read_pattern(in_str)
+    if board is not None:
+        # RLE, .cells or Macrocell
+        output = array_to_grid(board)
+
+    elif '[' in in_str and '{' in in_str:
         # assume input is a list of neighborhoods
         neighborhoods = json.loads(in_str)
         if type(neighborhoods) !=  list:
@@ -77,130 +73,629 @@ def input_to_grid(in_str):
             output.append(''.join([ str(int(n['alive'])) for n in row ]))
 
     else:
-        # assume input is a string, filter anything but 0, or 1
-        cells = list(filter(lambda c: c in ['0', '1'], in_str))
-
-        # make a grid out of it
-        sidelen = int(math.sqrt(len(cells)))
-        for row_idx in range(0, len(cells), sidelen):
-            output.append(''.join(cells[row_idx : row_idx + sidelen]))
+        # assume input is a string, one row per line, filter anything but 0,
+        # or 1
+        rows = [ ''.join(filter(lambda c: c in ['0', '1'], line))
+                 for line in in_str.splitlines() ]
+        rows = [ row for row in rows if row ]
+
+        # a single run of cells is a row, unless it makes a square
+        if len(rows) == 1:
+            sidelen = int(math.sqrt(len(rows[0])))
+            if sidelen > 1 and sidelen * sidelen == len(rows[0]):
+                rows = [ rows[0][i : i + sidelen]
+                         for i in range(0, len(rows[0]), sidelen) ]
+
+        # rows may be ragged, the missing cells are dead
+        width = max([ len(row) for row in rows ], default=0)
+        output = [ row.ljust(width, '0') for row in rows ]
 
     return output
 
 
 # setuptools entrypoint. Takes a grid, prints a list of neighborhoods
+# pass --packed to print them in the packed binary format
 def as_neighborhoods():
 
+    packed, args = packed_flag(sys.argv[1:])
+
     # support input via pipe or arg
     if not sys.stdin.isatty():
-        in_str = sys.stdin.read()
+        in_bytes = sys.stdin.buffer.read()
     else:
-        in_str = sys.argv[1]
-
-    in_grid = json.loads(in_str)
-    out_list = grid_as_neighborhoods(in_grid)
-    print(json.dumps(out_list, indent=2))
-
-def test_to_neighborhoods():
-
-    in_grid = ['010',
-               '001',
-               '111']
-
-    out_neighborhoods = [ # row 0
-                          { 'x'         : 0,
-                            'y'         : 0,
-                            'alive'     : False,
-                            'neighbors' : 1 },
-
-                          { 'x'         : 1,
-                            'y'         : 0,
-                            'alive'     : True,
-                            'neighbors' : 1 },
-
-                          { 'x'         : 2,
-                            'y'         : 0,
-                            'alive'     : False,
-                            'neighbors' : 2 },
-
-                          # row  1
-                          { 'x'         : 0,
-                            'y'         : 1,
-                            'alive'     : False,
-                            'neighbors' : 3 },
-
-                          { 'x'         : 1,
-                            'y'         : 1,
-                            'alive'     : False,
-                            'neighbors' : 5 },
-
-                          { 'x'         : 2,
-                            'y'         : 1,
-                            'alive'     : True,
-                            'neighbors' : 3 },
-
-                          # row 2
-                          { 'x'         : 0,
-                            'y'         : 2,
-                            'alive'     : True,
-                            'neighbors' : 1 },
-
-                          { 'x'         : 1,
-                            'y'         : 2,
-                            'alive'     : True,
-                            'neighbors' : 3 },
-
-                          { 'x'         : 2,
-                            'y'         : 2,
-                            'alive'     : True,
-                            'neighbors' : 2 }
-                        ]
-
-    assert grid_as_neighborhoods(in_grid) == out_neighborhoods
+        in_bytes = args[0].encode()
 
-# count living neighbors for each cell
-def grid_as_neighborhoods(_grid):
+    board = load_board(in_bytes)
+    if packed:
+        sys.stdout.buffer.write(pack_neighborhoods(board, count_neighbors(board)))
+    else:
+        out_list = grid_as_neighborhoods(array_to_grid(board))
+        print(json.dumps(out_list, indent=2))
 
-    grid = _grid
-    Coordinates = namedtuple('Coordinates', 'x y')
+# count living neighbors for each cell
+def grid_as_neighborhoods(grid):
 
-    cells = []
-    for y in range(0, len(grid)):
-       for x in range(0, len(grid[y])):
-           cells.append(Coordinates(x, y))
+    board = grid_to_array(grid)
+    neighbors = count_neighbors(board)
 
-    def is_alive(the_cell, unit_vector):
-        x = the_cell.x + unit_vector.x
-        y = the_cell.y + unit_vector.y
-        if x < 0 or y < 0:
-            return False
-        else:
-            try:
-                return grid[y][x] == '1'
-            except IndexError:
-                return False
+    # only build python objects once the counting is done
+    ys, xs = np.indices(board.shape)
+    cells = zip(xs.ravel().tolist(),
+                ys.ravel().tolist(),
+                board.ravel().astype(bool).tolist(),
+                neighbors.ravel().tolist())
 
     neighborhoods = []
+    for x, y, alive, count in cells:
+        neighborhoods.append({ 'x'         : x,
+                               'y'         : y,
+                               'alive'     : alive,
+                               'neighbors' : count })
 
-    for cell in cells:
-        # offset in all directions, count living neighbors
-        neighbors = 0
-        for vx in [ -1, 0, +1 ]:
-            for vy in [ -1, 0, +1 ]:
+    return neighborhoods
 
-                # don't count a cell as its own neighbor
-                if not (vx == vy == 0):
-                    unit_vector = Coordinates(vx, vy)
-                    if is_alive(cell, unit_vector):
-                        neighbors += 1
 
-        alive = grid[cell.y][cell.x] == '1'
+# array-in/array-out API
+# a board is a 2-D uint8 array indexed [y, x], 1 for alive and 0 for dead
+# cells beyond the edge of the board are considered dead
 
-        neighborhoods.append({ 'x'         : cell.x,
-                               'y'         : cell.y,
-                               'alive'     : alive,
-                               'neighbors' : neighbors })
+# grid of '0'/'1' strings -> board
+def grid_to_array(grid):
 
-    return neighborhoods
+    if not grid:
+        return np.zeros((0, 0), dtype=np.uint8)
+
+    rows = [ np.frombuffer(row.encode('ascii'), dtype=np.uint8) for row in grid ]
+    return (np.stack(rows) == ord('1')).astype(np.uint8)
+
+# board -> grid of '0'/'1' strings
+def array_to_grid(board):
+
+    chars = np.where(board, ord('1'), ord('0')).astype(np.uint8)
+    return [ row.tobytes().decode('ascii') for row in chars ]
 
+# how many of each cell's eight neighbors are alive?
+def count_neighbors(board):
+
+    rows, cols = board.shape
 
+    # surround the board with dead cells so every shift stays in bounds
+    padded = np.zeros((rows + 2, cols + 2), dtype=np.uint8)
+    padded[1:-1, 1:-1] = board
+
+    counts = np.zeros((rows, cols), dtype=np.uint8)
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if not (dy == dx == 1):
+                counts += padded[dy : dy + rows, dx : dx + cols]
+
+    return counts
+
+# Life-like rules in B/S notation: the neighbor counts where a dead cell is
+# born, and where a live cell survives
+CONWAY = 'B3/S23'
+HIGHLIFE = 'B36/S23'
+DAY_AND_NIGHT = 'B3678/S34678'
+
+# 'B36/S23' -> ((3, 6), (2, 3)), either part may come first
+def parse_rule(rule):
+
+    parts = rule.upper().replace(' ', '').split('/')
+    letters = sorted(part[:1] for part in parts)
+    if letters != ['B', 'S'] or not all(part[1:].isdigit() or part[1:] == ''
+                                        for part in parts):
+        raise ValueError(f"not a B/S rule: {rule}")
+
+    counts = { part[0] : tuple(sorted(set(int(d) for d in part[1:]))) for part in parts }
+    if any(n > 8 for n in counts['B'] + counts['S']):
+        raise ValueError(f"a cell only has 8 neighbors: {rule}")
+
+    return counts['B'], counts['S']
+
+# a rule as a lookup table: table[alive, neighbors] is the cell's next state
+@functools.lru_cache(maxsize=None)
+def compile_rule(rule):
+
+    born, survive = parse_rule(rule)
+    table = np.zeros((2, 9), dtype=np.uint8)
+    table[0, list(born)] = 1
+    table[1, list(survive)] = 1
+    table.flags.writeable = False  # it's shared by every caller
+    return table
+
+# the next state of every cell, in one gather from the rule's table
+def apply_rule(table, board, counts):
+    return table.ravel().take(board * np.uint8(9) + counts)
+
+# advance a board by one generation
+def step(board, rule=CONWAY):
+    return apply_rule(compile_rule(rule), board, count_neighbors(board))
+
+# split a --rule flag from the other command line arguments
+def rule_flag(args, default=CONWAY):
+
+    args = list(args)
+    rule = default
+    while '--rule' in args:
+        i = args.index('--rule')
+        rule = args[i + 1]
+        del args[i : i + 2]
+
+    parse_rule(rule)  # complain early
+    return rule, args
+
+# incremental stepping
+# the board is divided into tiles, and a tile is only recomputed if it, or a
+# tile next to it, changed in the previous generation.  Still lifes and empty
+# space cost nothing once they settle.
+class IncrementalStepper:
+
+    def __init__(self, board, tile=32, dense=0.5, rule=CONWAY):
+        if 0 in parse_rule(rule)[0]:
+            raise ValueError(f"{rule} changes empty space, every tile is always dirty")
+        self.board = board.copy()
+        self.rule = rule
+        self.tile = tile
+        self.dense = dense  # above this share of dirty tiles, step everything
+        rows, cols = board.shape
+        self.dirty = np.ones((-(-rows // tile), -(-cols // tile)), dtype=bool)
+
+    # which tiles contain a True cell
+    def _tiles_with(self, cells):
+        rows, cols = cells.shape
+        ty, tx = self.dirty.shape
+        padded = np.zeros((ty * self.tile, tx * self.tile), dtype=bool)
+        padded[:rows, :cols] = cells
+        return padded.reshape(ty, self.tile, tx, self.tile).any(axis=(1, 3))
+
+    def step(self):
+
+        board = self.board
+        rows, cols = board.shape
+        t = self.tile
+
+        if self.dirty.mean() > self.dense:
+            # most of the board is active, a single vectorized step is cheaper
+            new = step(board, self.rule)
+            changed = self._tiles_with(new != board)
+
+        else:
+            new = board.copy()
+            changed = np.zeros_like(self.dirty)
+            for ty, tx in np.argwhere(self.dirty):
+                y0, x0 = ty * t, tx * t
+                y1, x1 = min(y0 + t, rows), min(x0 + t, cols)
+
+                # step the tile with a one cell halo, then drop the halo
+                top, left = max(y0 - 1, 0), max(x0 - 1, 0)
+                window = step(board[top : min(y1 + 1, rows), left : min(x1 + 1, cols)],
+                              self.rule)
+                tile = window[y0 - top : y1 - top, x0 - left : x1 - left]
+
+                if (tile != board[y0:y1, x0:x1]).any():
+                    new[y0:y1, x0:x1] = tile
+                    changed[ty, tx] = True
+
+        # changes can only spread one cell per generation, so next time
+        # only the changed tiles and their neighbors need another look
+        padded = np.pad(changed, 1)
+        self.dirty = np.zeros_like(changed)
+        for dy in (0, 1, 2):
+            for dx in (0, 1, 2):
+                self.dirty |= padded[dy : dy + changed.shape[0],
+                                     dx : dx + changed.shape[1]]
+
+        self.board = new
+        return new
+
+# packed binary format
+# a fixed header followed by the board, one bit per cell, each row padded
+# to a whole byte.  Neighborhoods append one byte per cell for the neighbor
+# count.  Records can be concatenated to make a stream of boards.
+MAGIC = b'LIFE'
+VERSION = 1
+GRID = 0
+NEIGHBORHOODS = 1
+DELTA = 2  # see life.delta
+header_format = struct.Struct('<4sBBII')  # magic, version, kind, rows, cols
+
+# split a --packed flag from the other command line arguments
+def packed_flag(args):
+    return '--packed' in args, [ a for a in args if a != '--packed' ]
+
+def is_packed(in_bytes):
+    return in_bytes[:len(MAGIC)] == MAGIC
+
+def _pack(kind, board):
+    rows, cols = board.shape
+    header = header_format.pack(MAGIC, VERSION, kind, rows, cols)
+    return header + np.packbits(board, axis=1).tobytes()
+
+def pack_grid(board):
+    return _pack(GRID, board)
+
+def pack_neighborhoods(board, counts):
+    return _pack(NEIGHBORHOODS, board) + counts.astype(np.uint8).tobytes()
+
+# read one packed record from a binary stream
+# returns (board, counts), counts is None for a plain grid
+# returns None at the end of the stream
+def read_packed(stream):
+
+    header = stream.read(header_format.size)
+    if not header:
+        return None
+    if len(header) < header_format.size:
+        raise ValueError("truncated packed header")
+
+    magic, version, kind, rows, cols = header_format.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a packed life record")
+    if kind not in (GRID, NEIGHBORHOODS):
+        raise ValueError(f"packed record of kind {kind} is not a board")
+
+    row_bytes = (cols + 7) // 8
+    bits = np.frombuffer(stream.read(rows * row_bytes), dtype=np.uint8)
+    if bits.size != rows * row_bytes:
+        raise ValueError("truncated packed board")
+    board = np.unpackbits(bits.reshape(rows, row_bytes),
+                         axis=1, count=cols)
+
+    counts = None
+    if kind == NEIGHBORHOODS:
+        plane = np.frombuffer(stream.read(rows * cols), dtype=np.uint8)
+        if plane.size != rows * cols:
+            raise ValueError("truncated neighbor counts")
+        counts = plane.reshape(rows, cols)
+
+    return board, counts
+
+# read all packed records from a binary stream
+def iter_packed(stream):
+    record = read_packed(stream)
+    while record is not None:
+        yield record
+        record = read_packed(stream)
+
+def unpack(in_bytes):
+    return read_packed(io.BytesIO(in_bytes))
+
+# a stream with some bytes put back in front of it
+class _Prefixed:
+
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def read(self, size):
+        head, self.prefix = self.prefix[:size], self.prefix[size:]
+        if len(head) < size:
+            head += self.stream.read(size - len(head))
+        return head
+
+# boards from a stream of packed grids, or of json grids, one per line
+def iter_boards(stream):
+
+    head = stream.read(len(MAGIC))
+    if head == MAGIC:
+        for board, _ in iter_packed(_Prefixed(head, stream)):
+            yield board
+    else:
+        # the first few bytes may run past the end of a short first line
+        first = (head + stream.readline()).splitlines()
+        for line in itertools.chain(first, iter(stream.readline, b'')):
+            if line.strip():
+                yield grid_to_array(json.loads(line))
+
+# accept a packed record, a pattern file, a json grid, or anything
+# input_to_grid understands
+def load_board(in_bytes):
+
+    if is_packed(in_bytes):
+        board, _ = unpack(in_bytes)
+        return board
+
+    in_str = in_bytes.decode()
+    board = read_pattern(in_str)
+    if board is not None:
+        return board
+
+    try:
+        grid = json.loads(in_str)
+    except json.JSONDecodeError:
+        grid = None
+    if not (isinstance(grid, list) and all(isinstance(row, str) for row in grid)):
+        grid = input_to_grid(in_str)
+
+    return grid_to_array(grid)
+
+# standard pattern formats
+# RLE, plaintext (.cells) and Macrocell, as used by Golly and the LifeWiki.
+# The readers take any iterable of text lines (like an open file) and fill in
+# the board as they go, the writers take a text stream.
+
+# 'x = 3, y = 3, rule = B3/S23'
+_rle_header = re.compile(r'x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*(\S+))?',
+                         re.IGNORECASE)
+_rle_token = re.compile(r'(\d*)([^\d\s])')
+
+def read_rle(lines):
+
+    board = None
+    x = y = 0
+    carry = ''  # a run count can be split across lines
+
+    for line in lines:
+        line = line.strip()
+
+        if board is None:
+            if not line or line.startswith('#'):
+                continue
+            header = _rle_header.match(line)
+            if not header:
+                raise ValueError("RLE needs an 'x = ..., y = ...' header")
+            board = np.zeros((int(header[2]), int(header[1])), dtype=np.uint8)
+            rows, cols = board.shape
+            continue
+
+        line = carry + line
+        body = line.rstrip('0123456789')
+        carry = line[len(body):]
+
+        for count, tag in _rle_token.findall(body):
+            n = int(count) if count else 1
+            if tag == '!':
+                return board
+            elif tag == '$':
+                y += n
+                x = 0
+            elif tag in 'b.':
+                x += n
+            else:
+                # 'o', or any live state of a multi-state rule
+                if y >= rows or x + n > cols:
+                    raise ValueError(f"RLE pattern runs past its {cols}x{rows} header")
+                board[y, x : x + n] = 1
+                x += n
+
+    if board is None:
+        raise ValueError("RLE needs an 'x = ..., y = ...' header")
+    return board
+
+def write_rle(board, out, rule=CONWAY):
+
+    rows, cols = board.shape
+    out.write(f"x = {cols}, y = {rows}, rule = {rule}\n")
+
+    # lines are kept under 70 characters, like Golly's
+    line = []
+    length = 0
+    def emit(n, tag):
+        nonlocal length
+        token = f"{n if n > 1 else ''}{tag}"
+        if length + len(token) > 70:
+            out.write(''.join(line) + '\n')
+            line.clear()
+            length = 0
+        line.append(token)
+        length += len(token)
+
+    ends = 0  # rows ended, but not written yet, so empty rows collapse
+    for y, row in enumerate(board):
+        if y:
+            ends += 1
+        live = np.flatnonzero(row)
+        if not live.size:
+            continue
+        if ends:
+            emit(ends, '$')
+            ends = 0
+
+        # runs start wherever a cell differs from the one before it
+        starts = np.flatnonzero(np.diff(row[: live[-1] + 1])) + 1
+        bounds = [0, *starts.tolist(), int(live[-1]) + 1]
+        for start, stop in zip(bounds, bounds[1:]):
+            emit(stop - start, 'o' if row[start] else 'b')
+
+    emit(1, '!')
+    out.write(''.join(line) + '\n')
+
+# comments start with '!', or '#' like in RLE files, which pattern_format
+# skips over too
+def read_cells(lines):
+
+    rows = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line.startswith(('!', '#')):
+            continue
+        chars = np.frombuffer(line.encode('ascii'), dtype=np.uint8)
+        rows.append((chars == ord('O')) | (chars == ord('*')))
+
+    board = np.zeros((len(rows), max((len(r) for r in rows), default=0)),
+                     dtype=np.uint8)
+    for y, row in enumerate(rows):
+        board[y, : len(row)] = row
+    return board
+
+def write_cells(board, out, name=None):
+    if name:
+        out.write(f"!Name: {name}\n")
+    for row in np.where(board, ord('O'), ord('.')).astype(np.uint8):
+        out.write(row.tobytes().decode('ascii') + '\n')
+
+# Macrocell is a quadtree: 8x8 leaves, then nodes of level k (2^k cells on a
+# side) that refer to four earlier lines by number, 0 being empty space.  The
+# reader builds the tree with whatever leaf, join and empty functions it is
+# given, so life.hashlife can read a pattern straight into its own nodes.
+# By default it builds a board, cropped to the live cells.
+def read_macrocell(lines, leaf=None, join=None, empty=None):
+
+    if leaf is None:
+        return _macrocell_board(read_macrocell(lines,
+                                               leaf=_box_leaf,
+                                               join=_box_join,
+                                               empty=lambda k: (k, None, None)))
+    nodes = [ None ]
+    levels = [ None ]
+
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in '[#':
+            continue
+
+        if line[0] in '.*$':
+            cells = np.zeros((8, 8), dtype=np.uint8)
+            x = y = 0
+            for char in line:
+                if char == '$':
+                    y += 1
+                    x = 0
+                else:
+                    if char == '*':
+                        cells[y, x] = 1
+                    x += 1
+            nodes.append(leaf(cells))
+            levels.append(3)
+
+        else:
+            k, *children = [ int(n) for n in line.split() ]
+            if k < 4 or len(children) != 4:
+                raise ValueError(f"not a two state macrocell node: {line}")
+            for child in children:
+                if child and levels[child] != k - 1:
+                    raise ValueError(f"node {child} is not of level {k - 1}")
+            nodes.append(join(k, *[ nodes[c] if c else empty(k - 1) for c in children ]))
+            levels.append(k)
+
+    if len(nodes) == 1:
+        raise ValueError("empty macrocell")
+    return nodes[-1]
+
+# nodes for the default reader, as (level, leaf cells or four children, box)
+# box holds the first and last live row and column, or None if there are none
+# patterns can be far bigger than their live cells, so no node is ever filled
+# in with its dead space
+def _box_leaf(cells):
+    ys, xs = np.nonzero(cells)
+    if not ys.size:
+        return (3, cells, None)
+    return (3, cells, (ys.min(), xs.min(), ys.max(), xs.max()))
+
+def _box_join(k, *children):
+    half = 1 << (k - 1)
+    boxes = []
+    for (_, _, box), (dy, dx) in zip(children, [ (0, 0), (0, half), (half, 0), (half, half) ]):
+        if box is not None:
+            y0, x0, y1, x1 = box
+            boxes.append((y0 + dy, x0 + dx, y1 + dy, x1 + dx))
+    if not boxes:
+        return (k, children, None)
+    return (k, children, (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                          max(b[2] for b in boxes), max(b[3] for b in boxes)))
+
+# the board of live cells under a node from _box_join, like Universe.to_array
+def _macrocell_board(root):
+
+    _, _, box = root
+    if box is None:
+        return np.zeros((0, 0), dtype=np.uint8)
+    top, left, bottom, right = box
+    board = np.zeros((bottom - top + 1, right - left + 1), dtype=np.uint8)
+
+    def fill(node, y, x):
+        k, contents, box = node
+        if box is None:
+            return
+        if k == 3:
+            # the part of the leaf inside the board
+            y0, x0 = max(y, top), max(x, left)
+            y1, x1 = min(y + 8, bottom + 1), min(x + 8, right + 1)
+            board[y0 - top : y1 - top, x0 - left : x1 - left] = \
+                contents[y0 - y : y1 - y, x0 - x : x1 - x]
+            return
+        half = 1 << (k - 1)
+        fill(contents[0], y,        x)
+        fill(contents[1], y,        x + half)
+        fill(contents[2], y + half, x)
+        fill(contents[3], y + half, x + half)
+
+    fill(root, 0, 0)
+    return board
+
+def macrocell_leaf(cells):
+    rows = []
+    for row in cells:
+        live = np.flatnonzero(row)
+        last = int(live[-1]) + 1 if live.size else 0
+        rows.append(''.join('*' if c else '.' for c in row[:last].tolist()))
+    while rows and not rows[-1]:
+        rows.pop()
+    return '$'.join(rows) + '$'
+
+def write_macrocell(board, out, rule=CONWAY):
+
+    rows, cols = board.shape
+    k = 3
+    while (1 << k) < max(rows, cols):
+        k += 1
+    padded = np.zeros((1 << k, 1 << k), dtype=np.uint8)
+    padded[:rows, :cols] = board
+
+    out.write(f"[M2] (life)\n#R {rule}\n")
+
+    # identical subtrees are written once
+    numbers = {}
+    def number(y, x, k):
+        size = 1 << k
+        square = padded[y : y + size, x : x + size]
+        if not square.any():
+            return 0
+        if k == 3:
+            line = macrocell_leaf(square)
+        else:
+            half = size >> 1
+            line = f"{k} {number(y, x, k - 1)} {number(y, x + half, k - 1)} " \
+                   f"{number(y + half, x, k - 1)} {number(y + half, x + half, k - 1)}"
+        if line not in numbers:
+            numbers[line] = len(numbers) + 1
+            out.write(line + '\n')
+        return numbers[line]
+
+    if not number(0, 0, k):
+        # an empty pattern still needs a root
+        out.write('$\n')
+
+pattern_readers = { 'rle'   : read_rle,
+                    'cells' : read_cells,
+                    'mc'    : read_macrocell }
+
+pattern_writers = { 'rle'   : write_rle,
+                    'cells' : write_cells,
+                    'mc'    : write_macrocell }
+
+# which of the formats above some text is in, or None
+def pattern_format(in_str):
+
+    if in_str.lstrip().startswith('[M2]'):
+        return 'mc'
+
+    for line in io.StringIO(in_str):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#'):
+            continue  # comments come before an RLE header
+        if _rle_header.match(line):
+            return 'rle'
+        if line.startswith('!') or not line.strip('.O*'):
+            return 'cells'
+        return None
+    return None
+
+# the board in a pattern file, or None if it's in none of the formats above
+def read_pattern(in_str):
+    fmt = pattern_format(in_str)
+    if fmt is None:
+        return None
+    return pattern_readers[fmt](io.StringIO(in_str))
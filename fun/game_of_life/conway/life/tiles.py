@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+from multiprocessing import Pool
+import numpy as np
+from life.stage import (load_board, array_to_grid, step, pack_grid, unpack,
+                        packed_flag)
+
+# Split a board into tiles that can be stepped separately.
+#
+# Each tile is stepped together with a halo: the cells within `halo` of its
+# edge, borrowed from its neighbors.  Errors creep in from the outside of the
+# halo by one cell per generation, so a tile with a halo of h can advance h
+# generations before it needs fresh cells from its neighbors.
+#
+# Cells beyond the edge of the whole board stay dead, like in life.stage.
+
+# where each tile starts and ends along one axis, sizes differ by at most one
+def bounds(length, count, halo):
+    edges = [ (length * i) // count for i in range(count + 1) ]
+    if min(b - a for a, b in zip(edges, edges[1:])) < halo:
+        raise ValueError(f"tiles of a {length} cell side split {count} ways"
+                         f" are narrower than a halo of {halo}")
+    return list(zip(edges, edges[1:]))
+
+# advance a tile with its halo, keeping cells beyond the board dead
+def advance_padded(padded, inside, generations):
+    for _ in range(generations):
+        padded = step(padded) & inside
+    return padded
+
+# the part of a padded tile that is still correct
+def core(padded, halo):
+    return padded[halo : padded.shape[0] - halo, halo : padded.shape[1] - halo]
+
+# a tile of a board, with its halo and a mask of which cells are on the board
+def window(board, y0, y1, x0, x1, halo):
+
+    rows, cols = board.shape
+    padded = np.zeros((y1 - y0 + 2 * halo, x1 - x0 + 2 * halo), dtype=np.uint8)
+    inside = np.zeros_like(padded)
+
+    top, bottom = max(y0 - halo, 0), min(y1 + halo, rows)
+    left, right = max(x0 - halo, 0), min(x1 + halo, cols)
+    dy, dx = top - (y0 - halo), left - (x0 - halo)
+
+    padded[dy : dy + bottom - top, dx : dx + right - left] = board[top:bottom, left:right]
+    inside[dy : dy + bottom - top, dx : dx + right - left] = 1
+    return padded, inside
+
+def _advance_window(args):
+    padded, inside, generations, halo = args
+    return core(advance_padded(padded, inside, generations), halo)
+
+# advance a whole board tile by tile, optionally in a local process pool
+def step_tiled(board, tiles, generations, halo=1, processes=None):
+
+    row_bounds = bounds(board.shape[0], tiles, halo)
+    col_bounds = bounds(board.shape[1], tiles, halo)
+
+    pool = Pool(processes) if processes else None
+    try:
+        while generations > 0:
+            gens = min(halo, generations)
+            work = [ window(board, y0, y1, x0, x1, halo) + (gens, halo)
+                     for y0, y1 in row_bounds
+                     for x0, x1 in col_bounds ]
+
+            if pool:
+                cores = pool.map(_advance_window, work)
+            else:
+                cores = [ _advance_window(w) for w in work ]
+
+            # every tile was computed from the old board, so swap in the new one
+            board = np.zeros_like(board)
+            cores = iter(cores)
+            for y0, y1 in row_bounds:
+                for x0, x1 in col_bounds:
+                    board[y0:y1, x0:x1] = next(cores)
+
+            generations -= gens
+    finally:
+        if pool:
+            pool.close()
+
+    return board
+
+# Tiles in files, so that each tile can be stepped by its own pipeline node.
+#
+# A directory holds a layout, and for every round, a packed grid per tile
+# plus the four strips (top, bottom, left, right) its neighbors need.
+
+sides = ('top', 'bottom', 'left', 'right')
+
+def _round_dir(directory, round_):
+    return os.path.join(directory, str(round_))
+
+def _tile_path(directory, round_, r, c):
+    return os.path.join(_round_dir(directory, round_), f"tile_{r}_{c}")
+
+def _strip_path(directory, round_, r, c, side):
+    return os.path.join(_round_dir(directory, round_), f"halo_{r}_{c}_{side}")
+
+def _write(path, board):
+    with open(path, 'wb') as f:
+        f.write(pack_grid(board))
+
+def _read(path):
+    with open(path, 'rb') as f:
+        board, _ = unpack(f.read())
+    return board
+
+def read_layout(directory):
+    with open(os.path.join(directory, 'layout.json')) as f:
+        return json.load(f)
+
+# store a tile and the strips its neighbors will borrow
+def write_tile(directory, round_, r, c, tile, halo):
+
+    os.makedirs(_round_dir(directory, round_), exist_ok=True)
+    _write(_tile_path(directory, round_, r, c), tile)
+
+    strips = { 'top'    : tile[:halo, :],
+               'bottom' : tile[-halo:, :],
+               'left'   : tile[:, :halo],
+               'right'  : tile[:, -halo:] }
+    for side in sides:
+        _write(_strip_path(directory, round_, r, c, side), strips[side])
+
+# write round 0 of a tiled board
+def split_to(directory, board, tiles, halo):
+
+    rows, cols = board.shape
+    row_bounds = bounds(rows, tiles, halo)
+    col_bounds = bounds(cols, tiles, halo)
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'layout.json'), 'w') as f:
+        json.dump({ 'rows'  : rows,
+                    'cols'  : cols,
+                    'tiles' : tiles,
+                    'halo'  : halo }, f)
+
+    for r, (y0, y1) in enumerate(row_bounds):
+        for c, (x0, x1) in enumerate(col_bounds):
+            write_tile(directory, 0, r, c, board[y0:y1, x0:x1], halo)
+
+# rebuild a tile's halo from its neighbors' strips
+def gather(directory, round_, r, c):
+
+    layout = read_layout(directory)
+    tiles, halo = layout['tiles'], layout['halo']
+
+    tile = _read(_tile_path(directory, round_, r, c))
+    th, tw = tile.shape
+    h = halo
+
+    padded = np.zeros((th + 2 * h, tw + 2 * h), dtype=np.uint8)
+    inside = np.zeros_like(padded)
+    padded[h : h + th, h : h + tw] = tile
+    inside[h : h + th, h : h + tw] = 1
+
+    # neighbor offset, which of its strips to borrow, which part, and where
+    # it lands in the padded tile
+    borrow = [ (-1,  0, 'bottom', np.s_[:, :],  np.s_[:h,      h : h + tw]),
+               ( 1,  0, 'top',    np.s_[:, :],  np.s_[h + th:, h : h + tw]),
+               ( 0, -1, 'right',  np.s_[:, :],  np.s_[h : h + th, :h]),
+               ( 0,  1, 'left',   np.s_[:, :],  np.s_[h : h + th, h + tw:]),
+               (-1, -1, 'bottom', np.s_[:, -h:], np.s_[:h,      :h]),
+               (-1,  1, 'bottom', np.s_[:, :h],  np.s_[:h,      h + tw:]),
+               ( 1, -1, 'top',    np.s_[:, -h:], np.s_[h + th:, :h]),
+               ( 1,  1, 'top',    np.s_[:, :h],  np.s_[h + th:, h + tw:]) ]
+
+    for dr, dc, side, part, target in borrow:
+        nr, nc = r + dr, c + dc
+        if 0 <= nr < tiles and 0 <= nc < tiles:
+            padded[target] = _read(_strip_path(directory, round_, nr, nc, side))[part]
+            inside[target] = 1
+
+    return padded, inside
+
+# advance one tile from one round to the next
+def step_tile(directory, round_, r, c, generations):
+
+    halo = read_layout(directory)['halo']
+    if generations > halo:
+        raise ValueError(f"a halo of {halo} only covers {halo} generations")
+
+    padded, inside = gather(directory, round_, r, c)
+    tile = core(advance_padded(padded, inside, generations), halo)
+    write_tile(directory, round_ + 1, r, c, tile, halo)
+
+# reassemble the board at some round
+def join_from(directory, round_):
+
+    layout = read_layout(directory)
+    tiles = layout['tiles']
+
+    return np.block([ [ _read(_tile_path(directory, round_, r, c))
+                        for c in range(tiles) ]
+                      for r in range(tiles) ])
+
+# setuptools entrypoint, steps a board as tiles
+# use like:
+#   cat grid.json | life_tile split TILES HALO DIR     # tiles per side
+#   life_tile step ROUND ROW COL GENERATIONS DIR       # one tile, one round
+#   life_tile join ROUND DIR                           # print the board
+#   cat grid.json | life_tile local GENERATIONS TILES HALO [PROCESSES]
+# pass --packed to print the board in the packed binary format
+def life_tile():
+
+    packed, args = packed_flag(sys.argv[1:])
+    command, args = args[0], args[1:]
+
+    if command == 'split':
+        tiles, halo, directory = int(args[0]), int(args[1]), args[2]
+        split_to(directory, load_board(sys.stdin.buffer.read()), tiles, halo)
+        return
+
+    if command == 'step':
+        round_, r, c, generations = [ int(a) for a in args[:4] ]
+        step_tile(args[4], round_, r, c, generations)
+        return
+
+    if command == 'join':
+        board = join_from(args[1], int(args[0]))
+
+    elif command == 'local':
+        generations, tiles, halo = [ int(a) for a in args[:3] ]
+        processes = int(args[3]) if len(args) > 3 else os.cpu_count()
+        board = step_tiled(load_board(sys.stdin.buffer.read()),
+                           tiles, generations, halo, processes)
+    else:
+        raise ValueError(f"unknown command: {command}")
+
+    if packed:
+        sys.stdout.buffer.write(pack_grid(board))
+    else:
+        print(json.dumps(array_to_grid(board), indent=2))
@@ -2,13 +2,38 @@ from setuptools import setup
 setup(name='life',
       packages=['life'],
       python_requires= '>=3.6',
-      install_requires=['pytest', 'Pillow', 'sh'],
+      install_requires=['numpy', 'Pillow', 'sh'],
+      extras_require={'test' : ['pytest']},
       entry_points={'console_scripts' : [
 
           'to_grid = life.stage:to_grid',
 
           'as_neighborhoods = life.stage:as_neighborhoods',
 
+          'apply_rules = life.rules:apply_rules',
+
+          'life_delta = life.delta:life_delta',
+
+          'life_run = life.run:life_run',
+
+          'life_history = life.history:life_history',
+
+          'remember_grid = life.cycles:remember_grid',
+
+          'hashlife = life.hashlife:hashlife',
+
+          'sparse_life = life.sparse:sparse_life',
+
+          'bitboard_life = life.bitboard:bitboard_life',
+
+          'life_tile = life.tiles:life_tile',
+
+          'life_ensemble = life.ensemble:life_ensemble',
+
           'to_png = life.show:to_png',
 
+          'life_render = life.render:life_render',
+
+          'life_animate = life.animate:life_animate',
+
           ]})
@@ -0,0 +1,21 @@
+import numpy as np
+from PIL import Image, ImageSequence
+from life.animate import animate_boards
+from life.show import image_from_board
+from life.stage import step
+
+def test_gif_frames(tmp_path):
+
+    board = np.zeros((8, 8), dtype=np.uint8)
+    board[3, 2:5] = 1
+    boards = [ board, step(board), board, board ]
+
+    path = tmp_path / 'life.gif'
+    with open(path, 'wb') as f:
+        assert animate_boards(boards, f, numbered=False) == 4
+
+    frames = [ frame.convert('RGB') for frame in ImageSequence.Iterator(Image.open(path)) ]
+    assert len(frames) == 4
+    for frame, board in zip(frames, boards):
+        expected = image_from_board(board).convert('RGB')
+        assert np.array_equal(np.asarray(frame), np.asarray(expected))
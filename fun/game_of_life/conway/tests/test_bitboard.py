@@ -0,0 +1,14 @@
+import numpy as np
+from life.bitboard import from_words, step_words, to_words
+from life.stage import step as stage_step
+
+def test_matches_stage_step():
+
+    for rows, cols in [ (10, 10), (7, 64), (9, 65), (20, 130) ]:
+        board = np.random.RandomState(cols).randint(0, 2, (rows, cols)).astype(np.uint8)
+        words = to_words(board)
+        expected = board
+        for _ in range(5):
+            expected = stage_step(expected)
+            words = step_words(words, cols)
+            assert (from_words(words, cols) == expected).all()
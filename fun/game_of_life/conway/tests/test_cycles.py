@@ -0,0 +1,16 @@
+from life.cycles import StateIndex
+from life.stage import grid_to_array, step
+
+def test_index_finds_blinker_period(tmp_path):
+
+    board = grid_to_array(['000',
+                           '111',
+                           '000'])
+
+    index = StateIndex(str(tmp_path))
+    assert index.record(board, 0) is None
+    assert index.record(step(board), 1) is None
+    assert index.record(step(step(board)), 2) == 0
+
+    # a second index sees what the first one stored
+    assert StateIndex(str(tmp_path)).lookup(step(board)) == 1
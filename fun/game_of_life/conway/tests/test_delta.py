@@ -0,0 +1,16 @@
+from life.delta import apply, diff, pack_delta, unpack_delta
+from life.stage import grid_to_array, step
+
+def test_delta_round_trip():
+
+    before = grid_to_array(['0000',
+                            '0111',
+                            '0000'])
+    after = step(before)
+
+    births, deaths = diff(before, after)
+    assert len(births) == 2 and len(deaths) == 2
+
+    shape, births, deaths = unpack_delta(pack_delta(before.shape, births, deaths))
+    assert shape == before.shape
+    assert (apply(before, births, deaths) == after).all()
@@ -0,0 +1,38 @@
+import numpy as np
+from life.ensemble import random_soups, simulate, step_batch, survey
+from life.stage import grid_to_array, step, CONWAY, HIGHLIFE
+
+def test_simulate_known_patterns():
+
+    block = grid_to_array(['0000',
+                           '0110',
+                           '0110',
+                           '0000'])
+    blinker = grid_to_array(['0000',
+                             '1110',
+                             '0000',
+                             '0000'])
+    dies = grid_to_array(['0000',
+                          '0100',
+                          '0000',
+                          '0000'])
+
+    block_s, blinker_s, dies_s = simulate(np.stack([block, blinker, dies]))
+
+    assert block_s == { 'lifespan' : 0, 'period' : 1, 'population' : 4 }
+    assert blinker_s == { 'lifespan' : 0, 'period' : 2, 'population' : 3 }
+    assert dies_s == { 'lifespan' : 1, 'period' : 1, 'population' : 0 }
+
+def test_step_batch_rule():
+
+    boards = random_soups(0, 3, 10, 12)
+    for rule in (CONWAY, HIGHLIFE):
+        stepped = step_batch(boards, rule)
+        for board, expected in zip(boards, stepped):
+            assert (step(board, rule) == expected).all()
+
+def test_survey_is_independent_of_chunking():
+    one = survey(10, 6, 8, 8, max_generations=200, processes=1, chunk=6)
+    many = survey(10, 6, 8, 8, max_generations=200, processes=1, chunk=4)
+    assert one == many
+    assert [ s['seed'] for s in one ] == list(range(10, 16))
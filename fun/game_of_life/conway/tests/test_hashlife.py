@@ -0,0 +1,50 @@
+import io
+import numpy as np
+from life.hashlife import Universe, advance_array
+from life.stage import grid_to_array, step, read_macrocell
+
+def test_glider_travels():
+
+    glider = grid_to_array(['010',
+                            '001',
+                            '111'])
+
+    # a glider moves one cell diagonally every four generations
+    universe = Universe.from_array(glider).advance(4 * 1000)
+    assert universe.population == 5
+    assert universe.bounds() == (1000, 1000, 3, 3)
+    assert (universe.to_array(1000, 1000, 3, 3) == glider).all()
+
+def test_matches_step():
+
+    board = np.zeros((32, 32), dtype=np.uint8)
+    board[12:20, 12:20] = np.random.RandomState(0).randint(0, 2, (8, 8))
+
+    expected = board
+    for generation in range(1, 8):
+        expected = step(expected)
+        # stays clear of the edges, so bounded and unbounded agree
+        assert (advance_array(board, generation) == expected).all()
+
+def test_macrocell_round_trip():
+
+    board = np.zeros((40, 40), dtype=np.uint8)
+    board[10:20, 10:20] = np.random.RandomState(7).randint(0, 2, (10, 10))
+
+    universe = Universe.from_array(board).advance(30)
+    out = io.StringIO()
+    universe.write_macrocell(out)
+
+    # the stage reader makes a board of the live cells
+    x, y, rows, cols = universe.bounds()
+    assert (read_macrocell(io.StringIO(out.getvalue()))
+            == universe.to_array(x, y, rows, cols)).all()
+
+    # and read back into nodes, it plays on the same
+    again = Universe.from_macrocell(io.StringIO(out.getvalue())).advance(50)
+    universe.advance(50)
+    assert again.population == universe.population
+    ax, ay, arows, acols = again.bounds()
+    assert (arows, acols) == universe.bounds()[2:]
+    assert (again.to_array(ax, ay, arows, acols)
+            == universe.to_array(*universe.bounds())).all()
@@ -0,0 +1,21 @@
+from life.history import History
+from life.stage import grid_to_array, step
+
+def test_history(tmp_path):
+
+    history = History(str(tmp_path / 'history'))
+    assert len(history) == 0
+
+    board = grid_to_array(['000',
+                           '111',
+                           '000',
+                           '000'])
+    boards = [ board, step(board), step(step(board)) ]
+    for tick, b in enumerate(boards):
+        assert history.append(b) == tick
+
+    assert len(history) == 3
+    assert (history.latest() == boards[2]).all()
+    assert (history[1] == boards[1]).all()
+    assert (history[-3] == boards[0]).all()
+    assert all((a == b).all() for a, b in zip(history.boards(1), boards[1:]))
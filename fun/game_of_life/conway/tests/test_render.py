@@ -0,0 +1,22 @@
+import io
+import os
+import numpy as np
+from life.render import FrameCache, render
+from life.show import image_from_board
+from life.stage import step
+
+def test_render_reuses_frames(tmp_path):
+
+    blinker = np.zeros((5, 5), dtype=np.uint8)
+    blinker[2, 1:4] = 1
+    boards = [ blinker, step(blinker), blinker, step(blinker), blinker ]
+
+    cache = FrameCache(str(tmp_path))
+    names = render(boards, cache, processes=1)
+
+    assert names[0] == names[2] == names[4] != names[1] == names[3]
+    assert sorted(os.listdir(str(tmp_path))) == sorted(set(names))
+
+    expected = io.BytesIO()
+    image_from_board(blinker).save(expected, format='PNG')
+    assert (tmp_path / names[0]).read_bytes() == expected.getvalue()
@@ -0,0 +1,43 @@
+import numpy as np
+from life.rules import (ISOLATE, SURVIVE, CROWD, REPRODUCE, IGNORE, classify,
+                        outcome, changes, tally, cells_for)
+from life.delta import diff
+from life.stage import grid_to_array, count_neighbors, step, HIGHLIFE
+
+def test_classify():
+
+    board = grid_to_array(['0100',
+                           '1110',
+                           '0110',
+                           '0000'])
+    counts = count_neighbors(board)
+    buckets = classify(board, counts)
+
+    # each cell matches the jq filter for its rule
+    alive = board == 1
+    assert ((buckets == ISOLATE)   == (alive & (counts < 2))).all()
+    assert ((buckets == SURVIVE)   == (alive & ((counts == 2) | (counts == 3)))).all()
+    assert ((buckets == CROWD)     == (alive & (counts > 3))).all()
+    assert ((buckets == REPRODUCE) == (~alive & (counts == 3))).all()
+    assert ((buckets == IGNORE)    == (~alive & (counts != 3))).all()
+
+    assert (outcome(buckets) == step(board)).all()
+
+    for ours, theirs in zip(changes(buckets), diff(board, step(board))):
+        assert (ours == theirs).all()
+    assert sum(tally(buckets).values()) == board.size
+
+    crowded = cells_for(CROWD, buckets, board, counts)
+    assert all(not c['alive'] and c['neighbors'] > 3 for c in crowded)
+    assert len(crowded) == tally(buckets)['crowd']
+    assert cells_for(IGNORE, buckets, board, counts, limit=2) == \
+           cells_for(IGNORE, buckets, board, counts)[:2]
+
+def test_classify_rule():
+
+    board = np.random.RandomState(6).randint(0, 2, (12, 12)).astype(np.uint8)
+    buckets = classify(board, rule=HIGHLIFE)
+    assert (outcome(buckets) == step(board, HIGHLIFE)).all()
+
+    counts = count_neighbors(board)
+    assert ((buckets == REPRODUCE) == ((board == 0) & np.isin(counts, [3, 6]))).all()
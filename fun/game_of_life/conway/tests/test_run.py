@@ -0,0 +1,14 @@
+from life.run import run
+from life.stage import grid_to_array
+
+def test_run_every_other():
+
+    # a blinker has period 2, so even generations match the start
+    start = grid_to_array(['000',
+                           '111',
+                           '000'])
+
+    states = list(run(start, 6, every=2))
+    assert len(states) == 3
+    for state in states:
+        assert (state == start).all()
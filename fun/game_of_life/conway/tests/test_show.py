@@ -0,0 +1,83 @@
+import numpy as np
+from life import show
+from life.show import (bg, border_size, cell_size, color, image_from_board,
+                       image_from_grid, redraw, scale_for, density, RAMP, shades)
+from life.delta import diff
+from life.stage import step
+
+def test_image_from_grid(tmp_path):
+    image = image_from_grid(['101','010','101'])
+    image.save(str(tmp_path / 'show.py.testimage.png'))
+
+def test_image_pixels():
+    image = image_from_grid(['10',
+                             '00',
+                             '01']).convert('RGB')
+
+    assert image.size == (2 * cell_size + 2 * border_size,
+                          3 * cell_size + 2 * border_size)
+    assert image.getpixel((0, 0)) == bg
+
+    # the last pixel of the first cell, and the first of the next one
+    edge = border_size + cell_size
+    assert image.getpixel((edge - 1, edge - 1)) == color["1"]
+    assert image.getpixel((edge, edge - 1)) == color["0"]
+    assert image.getpixel((edge, edge + cell_size)) == color["1"]
+
+def test_redraw_matches_full_render():
+
+    board = np.random.RandomState(4).randint(0, 2, (6, 9)).astype(np.uint8)
+    after = step(board)
+
+    image = redraw(image_from_board(board, number=9), after, *diff(board, after),
+                   number=10)
+    expected = image_from_board(after, number=10)
+    assert (np.asarray(image) == np.asarray(expected)).all()
+
+def test_image_from_grid_with_number(tmp_path):
+    image = image_from_grid(['1011','0101','1011','1100'], number=17)
+    image.save(str(tmp_path / 'show.py.testimage.number.png'))
+
+def test_scale_for(monkeypatch):
+
+    monkeypatch.setattr(show, 'max_size', 1000)
+    room = 1000 - 2 * border_size
+
+    assert scale_for((10, 20)) == (cell_size, 1)
+    assert scale_for((100, 3)) == (room // 100, 1)
+    assert scale_for((5, room)) == (1, 1)
+    assert scale_for((5, 3 * room + 1)) == (1, 4)
+
+def test_density():
+
+    board = np.zeros((5, 7), dtype=np.uint8)
+    board[:2, :2] = 1
+    board[4, 6] = 1
+    assert (density(board, 2) == [[1, 0, 0, 0],
+                                  [0, 0, 0, 0],
+                                  [0, 0, 0, 1]]).all()
+
+    board[0, 1] = 0
+    assert density(board, 2)[0, 0] == 0.75
+
+def test_big_boards_stay_small(monkeypatch):
+
+    monkeypatch.setattr(show, 'max_size', 100 + 2 * border_size)
+
+    # a live left half, and a right half with every other row alive
+    board = np.zeros((600, 600), dtype=np.uint8)
+    board[:, :300] = 1
+    board[::2, 300:] = 1
+
+    image = image_from_board(board, number=3)
+    assert max(image.size) <= 100 + 2 * border_size
+
+    pixels = np.asarray(image)
+    middle = image.size[1] // 2
+    assert pixels[middle, border_size] == RAMP + shades - 1
+    assert pixels[middle, image.size[0] - border_size - 1] == RAMP + round((shades - 1) / 2)
+
+    # redrawing a downsampled board makes a whole new frame
+    after = step(board)
+    image = redraw(image, after, *diff(board, after), number=4)
+    assert (np.asarray(image) == np.asarray(image_from_board(after, number=4))).all()
@@ -0,0 +1,29 @@
+import numpy as np
+from life.sparse import bounds, from_array, step, to_array
+from life.stage import step as board_step, grid_to_array
+
+def test_matches_board_step():
+
+    board = np.zeros((24, 24), dtype=np.uint8)
+    board[8:16, 8:16] = np.random.RandomState(1).randint(0, 2, (8, 8))
+
+    keys = from_array(board)
+    for _ in range(6):
+        board = board_step(board)
+        keys = step(keys)
+        assert (to_array(keys, 0, 0, 24, 24) == board).all()
+
+def test_glider_leaves_seed():
+
+    glider = grid_to_array(['010',
+                            '001',
+                            '111'])
+
+    # starting above and left of the origin, heading well past a 10x10 seed
+    keys = from_array(glider, x=-5, y=-5)
+    for _ in range(400):
+        keys = step(keys)
+
+    assert keys.size == 5
+    assert bounds(keys) == (95, 95, 3, 3)
+    assert (to_array(keys, 95, 95, 3, 3) == glider).all()
@@ -0,0 +1,318 @@
+import io
+import json
+import pytest
+import numpy as np
+from life.stage import (CONWAY, DAY_AND_NIGHT, HIGHLIFE, IncrementalStepper,
+                        array_to_grid, count_neighbors, grid_as_neighborhoods,
+                        grid_to_array, header_format, input_to_grid, is_packed,
+                        iter_boards, iter_packed, load_board, pack_grid,
+                        pack_neighborhoods, parse_rule, rule_flag, step, unpack,
+                        read_rle, write_rle, read_cells, write_cells,
+                        read_macrocell, write_macrocell, pattern_format)
+
+# input as defined by user
+def test_to_grid_str():
+    in_str = '''101
+                001
+                111'''
+
+    out = ['101',
+           '001',
+           '111']
+    assert input_to_grid(in_str) == out
+
+# rows are rows, whatever their length
+def test_to_grid_rectangular():
+
+    assert input_to_grid('0110\n1001\n0000') == ['0110', '1001', '0000']
+    assert input_to_grid('1 0 1\n0 0 1\n1 1 1') == ['101', '001', '111']
+    assert input_to_grid('\n  011\n\n  10\n') == ['011', '100']
+    assert input_to_grid('0110') == ['01', '10']
+    assert input_to_grid('011') == ['011']
+
+# input as filtered by rules
+def test_to_grid_neighbors():
+
+    in_str = json.dumps([{ 'x'     : 0,
+                           'y'     : 0,
+                           'alive' : False },
+
+                         { 'x'     : 1,
+                           'y'     : 0,
+                           'alive' : False },
+
+                         { 'x'     : 0,
+                           'y'     : 1,
+                           'alive' : True },
+
+                         { 'x'     : 1,
+                           'y'     : 1,
+                           'alive' : True }])
+
+    out = ['00',
+           '11']
+
+    assert input_to_grid(in_str) == out
+
+def test_to_neighborhoods():
+
+    in_grid = ['010',
+               '001',
+               '111']
+
+    out_neighborhoods = [ # row 0
+                          { 'x'         : 0,
+                            'y'         : 0,
+                            'alive'     : False,
+                            'neighbors' : 1 },
+
+                          { 'x'         : 1,
+                            'y'         : 0,
+                            'alive'     : True,
+                            'neighbors' : 1 },
+
+                          { 'x'         : 2,
+                            'y'         : 0,
+                            'alive'     : False,
+                            'neighbors' : 2 },
+
+                          # row  1
+                          { 'x'         : 0,
+                            'y'         : 1,
+                            'alive'     : False,
+                            'neighbors' : 3 },
+
+                          { 'x'         : 1,
+                            'y'         : 1,
+                            'alive'     : False,
+                            'neighbors' : 5 },
+
+                          { 'x'         : 2,
+                            'y'         : 1,
+                            'alive'     : True,
+                            'neighbors' : 3 },
+
+                          # row 2
+                          { 'x'         : 0,
+                            'y'         : 2,
+                            'alive'     : True,
+                            'neighbors' : 1 },
+
+                          { 'x'         : 1,
+                            'y'         : 2,
+                            'alive'     : True,
+                            'neighbors' : 3 },
+
+                          { 'x'         : 2,
+                            'y'         : 2,
+                            'alive'     : True,
+                            'neighbors' : 2 }
+                        ]
+
+    assert grid_as_neighborhoods(in_grid) == out_neighborhoods
+
+def test_array_round_trip():
+
+    grid = ['0110',
+            '1001',
+            '0000']
+
+    board = grid_to_array(grid)
+    assert board.shape == (3, 4)
+    assert array_to_grid(board) == grid
+
+def test_parse_rule():
+
+    assert parse_rule(CONWAY) == ((3,), (2, 3))
+    assert parse_rule('s23/b36') == ((3, 6), (2, 3))
+    assert parse_rule('B2/S') == ((2,), ())
+
+    for bad in [ '23/3', 'B3', 'B3/S29', 'B3/X23' ]:
+        with pytest.raises(ValueError):
+            parse_rule(bad)
+
+    assert rule_flag(['10', '--rule', HIGHLIFE, '2']) == (HIGHLIFE, ['10', '2'])
+    assert rule_flag(['10']) == (CONWAY, ['10'])
+
+def test_step_rules():
+
+    board = np.random.RandomState(16).randint(0, 2, (20, 30)).astype(np.uint8)
+    counts = count_neighbors(board)
+    alive = board == 1
+
+    conway = (~alive & (counts == 3)) | (alive & ((counts == 2) | (counts == 3)))
+    assert (step(board) == conway).all()
+
+    highlife = (~alive & ((counts == 3) | (counts == 6))) | (alive & ((counts == 2) | (counts == 3)))
+    assert (step(board, HIGHLIFE) == highlife).all()
+
+    born = np.isin(counts, [3, 6, 7, 8])
+    survives = np.isin(counts, [3, 4, 6, 7, 8])
+    day_and_night = (~alive & born) | (alive & survives)
+    assert (step(board, DAY_AND_NIGHT) == day_and_night).all()
+
+def test_step_blinker():
+
+    vertical = grid_to_array(['000',
+                              '111',
+                              '000'])
+
+    horizontal = grid_to_array(['010',
+                                '010',
+                                '010'])
+
+    assert (step(vertical) == horizontal).all()
+    assert (step(horizontal) == vertical).all()
+
+def test_incremental_matches_step():
+
+    board = np.zeros((40, 50), dtype=np.uint8)
+    board[5:15, 5:15] = np.random.RandomState(5).randint(0, 2, (10, 10))
+    board[30:32, 40:42] = 1  # a block, which never changes
+
+    stepper = IncrementalStepper(board, tile=8)
+    expected = board
+    for _ in range(30):
+        expected = step(expected)
+        assert (stepper.step() == expected).all()
+
+    # far from the soup, the block's tile has gone quiet
+    assert not stepper.dirty[30 // 8, 40 // 8]
+
+def test_packed_round_trip():
+
+    board = grid_to_array(['0110000001',
+                           '1001000000',
+                           '0000000011'])
+    counts = count_neighbors(board)
+
+    packed = pack_neighborhoods(board, counts)
+    assert is_packed(packed)
+
+    out_board, out_counts = unpack(packed)
+    assert (out_board == board).all()
+    assert (out_counts == counts).all()
+
+    # header plus two bytes per row plus a byte per cell
+    assert len(packed) == header_format.size + 3 * 2 + 30
+
+def test_packed_stream():
+
+    boards = [ grid_to_array(['01', '10']), grid_to_array(['111']) ]
+    stream = io.BytesIO(b''.join(pack_grid(b) for b in boards))
+
+    out = [ board for board, _ in iter_packed(stream) ]
+    assert len(out) == 2
+    assert all((a == b).all() for a, b in zip(boards, out))
+
+def test_iter_boards():
+
+    boards = [ grid_to_array(['01', '10']), grid_to_array(['1']) ]
+
+    packed = io.BytesIO(b''.join(pack_grid(b) for b in boards))
+    lines = io.BytesIO(b'["01", "10"]\n["1"]\n')
+    short = io.BytesIO(b'[]\n["01", "10"]\n')
+
+    for stream in (packed, lines):
+        out = list(iter_boards(stream))
+        assert all((a == b).all() for a, b in zip(boards, out))
+        assert len(out) == 2
+    assert len(list(iter_boards(short))) == 2
+
+def test_load_board():
+
+    expected = grid_to_array(['01', '10'])
+    assert (load_board(b'["01", "10"]') == expected).all()
+    assert (load_board(b'01 10') == expected).all()
+    assert (load_board(pack_grid(expected)) == expected).all()
+
+def _random_board(rows, cols, seed):
+    board = np.random.RandomState(seed).randint(0, 2, (rows, cols)).astype(np.uint8)
+    board[rows // 2] = 0  # an empty row, for the run of '$'
+    return board
+
+def _live_part(board):
+    ys, xs = np.nonzero(board)
+    return board[ys.min() : ys.max() + 1, xs.min() : xs.max() + 1]
+
+def test_rle():
+
+    glider = """#N Glider
+#C the smallest spaceship
+x = 3, y = 3, rule = B3/S23
+bob$2bo$3o!"""
+    assert array_to_grid(read_rle(io.StringIO(glider))) == ['010', '001', '111']
+
+    # run counts can be split across lines, and empty rows collapse
+    board = read_rle(['x = 12, y = 3', 'b1', '1o2$o!'])
+    assert array_to_grid(board) == ['0' + '1' * 11, '0' * 12, '1' + '0' * 11]
+
+    for rows, cols in [ (1, 1), (7, 3), (20, 130) ]:
+        board = _random_board(rows, cols, cols)
+        out = io.StringIO()
+        write_rle(board, out)
+        assert all(len(line) <= 70 for line in out.getvalue().splitlines())
+        assert (read_rle(io.StringIO(out.getvalue())) == board).all()
+
+    with pytest.raises(ValueError):
+        read_rle(['x = 2, y = 1', '3o!'])
+
+def test_cells():
+
+    pattern = """!Name: Blinker, and a block
+!
+.O
+.O....OO
+.O....OO
+"""
+    board = read_cells(io.StringIO(pattern))
+    assert array_to_grid(board) == ['01000000', '01000011', '01000011']
+
+    # '#' comments are taken for .cells, so they can't become rows
+    glider = '#C note\n.O.\n..O\nOOO'
+    assert pattern_format(glider) == 'cells'
+    assert array_to_grid(read_cells(io.StringIO(glider))) == ['010', '001', '111']
+    assert input_to_grid(glider) == ['010', '001', '111']
+
+    out = io.StringIO()
+    write_cells(board, out, name='blinker')
+    assert out.getvalue().startswith('!Name: blinker\n')
+    assert (read_cells(io.StringIO(out.getvalue())) == board).all()
+
+def test_macrocell():
+
+    glider = """[M2] (golly 2.0)
+#R B3/S23
+.*$..*$***$
+4 1 0 0 0
+"""
+    assert array_to_grid(read_macrocell(io.StringIO(glider))) == ['010', '001', '111']
+
+    for rows, cols in [ (5, 5), (20, 13), (40, 70) ]:
+        board = _random_board(rows, cols, rows)
+        board[0, 0] = board[-1, -1] = 1  # so nothing gets cropped
+        out = io.StringIO()
+        write_macrocell(board, out)
+        assert (read_macrocell(io.StringIO(out.getvalue())) == board).all()
+
+    # only the live cells are ever filled in, however big the square
+    far = [ '[M2]', '.*$..*$***$' ] + [ f"{k} 0 0 0 {k - 3}" for k in range(4, 41) ]
+    assert array_to_grid(read_macrocell(far)) == ['010', '001', '111']
+
+    # repeated squares are written once
+    out = io.StringIO()
+    write_macrocell(np.tile(grid_to_array(['010', '001', '111', '000']), (16, 8)), out)
+    assert len(out.getvalue().splitlines()) < 12
+
+def test_pattern_formats_load():
+
+    board = _live_part(_random_board(9, 14, 9))
+    for writer, fmt in [ (write_rle, 'rle'), (write_cells, 'cells'), (write_macrocell, 'mc') ]:
+        out = io.StringIO()
+        writer(board, out)
+        assert pattern_format(out.getvalue()) == fmt
+        assert (load_board(out.getvalue().encode()) == board).all()
+        assert input_to_grid(out.getvalue()) == array_to_grid(board)
+
+    assert pattern_format('["01", "10"]') is None
+    assert pattern_format('01\n10') is None
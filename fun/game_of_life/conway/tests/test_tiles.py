@@ -0,0 +1,30 @@
+import numpy as np
+from life.tiles import step_tiled, split_to, step_tile, join_from
+from life.stage import step
+
+def test_tiled_matches_step():
+
+    board = np.random.RandomState(2).randint(0, 2, (20, 17)).astype(np.uint8)
+
+    expected = board
+    for _ in range(7):
+        expected = step(expected)
+
+    for tiles, halo in [ (1, 1), (3, 1), (3, 2), (4, 4) ]:
+        assert (step_tiled(board, tiles, 7, halo) == expected).all()
+
+def test_tiles_through_files(tmp_path):
+
+    directory = str(tmp_path)
+    board = np.random.RandomState(3).randint(0, 2, (12, 12)).astype(np.uint8)
+    split_to(directory, board, tiles=3, halo=2)
+
+    expected = board
+    for round_, generations in enumerate([2, 1]):
+        for r in range(3):
+            for c in range(3):
+                step_tile(directory, round_, r, c, generations)
+        for _ in range(generations):
+            expected = step(expected)
+
+    assert (join_from(directory, 2) == expected).all()
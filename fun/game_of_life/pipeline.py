@@ -1,6 +1,7 @@
 import conducto as co
 from inspect import cleandoc
 import sys
+import os
 
 # Docker Images
 ###############
@@ -9,12 +10,23 @@ import sys
 game_of_life= co.Image(dockerfile='conway/Dockerfile',
                        context='conway')
 
+# for extending the game at runtime, also includes this file
+lazy_game_of_life = co.Image(dockerfile='conway/Dockerfile',
+                             context='conway',
+                             copy_dir='.')
+
 # Command Templates
 ###################
 
 # for all commands, use strict mode so that errors draw attention
 header = "set -euo pipefail"
 
+# every grid seen so far, indexed by digest
+seen_dir = "/conducto/data/pipeline/seen"
+
+# frames for every grid in the history, drawn after the game is played
+# identical grids share a frame, named after the digest of the grid
+frames_dir = "/conducto/data/pipeline/frames"
 
 # create the start state and stash it
 initialize_grid = cleandoc('''
@@ -30,168 +42,104 @@ initialize_grid = cleandoc('''
              0101010010
              0010011000' > grid.json
 
-    # store it as the only item in a list (subsequent grids coming soon)
-    cat grid.json | jq '[.]' | tee grids.json
-    cat grids.json > /conducto/data/pipeline/grids
-''').format(header=header)
+    # anything left by a previous run would mix old ticks in with these
+    rm -rf /conducto/data/pipeline/history /conducto/data/pipeline/history.index \
+           /conducto/data/pipeline/rules_* {frames_dir}
 
-# normalize grid representation
-show_grid_template = cleandoc('''
-     {header}
-     # get most recent grid
-     cat /conducto/data/pipeline/grids | jq '.[-1]' > grid.json
+    # store it as the first grid in the history (subsequent grids coming soon)
+    cat grid.json | life_history append /conducto/data/pipeline/history
 
-     # make an image
-     cat grid.json | to_png /conducto/data/pipeline/image_{tick}.png {tick}
-     IMAGE_URL=$(conducto-data-pipeline url --name "image_{tick}.png" | sed 's/"//g')
+    # start the index of seen grids, forgetting any from a previous run
+    rm -rf {seen_dir}
+    cat grid.json | remember_grid 0 {seen_dir}
+''').format(header=header, seen_dir=seen_dir, frames_dir=frames_dir)
 
-     # display it
-     echo -n "<ConductoMarkdown>
-     ![grid{tick}]($IMAGE_URL)
-     </ConductoMarkdown>"
-''')
-
-def show_grid(tick):
-    return show_grid_template.format(header=header, tick=tick)
-
-# create metadata for each cell
+# create metadata for each cell, and sort the cells by which rule applies
 find_neighborhoods_template = cleandoc('''
      {header}
-     # get most recent grid
-     cat /conducto/data/pipeline/grids | jq '.[-1]' > grid.json
-
-     # consider population density
-     cat grid.json | as_neighborhoods > neighborhoods.json
-     echo "Neighborhood Samples:"
-     cat neighborhoods.json | jq '[first, last]'
-
-     # store neighborhoods for rule consumption
-     cat neighborhoods.json > /conducto/data/pipeline/neighborhoods_{tick}
+     # consider population density of the most recent grid
+     life_history latest /conducto/data/pipeline/history --packed \\
+         | as_neighborhoods --packed \\
+         > /conducto/data/pipeline/neighborhoods_{tick}
+
+     # apply every rule in one pass, store what each one did
+     # (the counts, and a sample of the cells; the full lists are board-sized)
+     echo "Cells per rule:"
+     cat /conducto/data/pipeline/neighborhoods_{tick} \\
+         | apply_rules /conducto/data/pipeline/rules_{tick} --sample {sample} --rule {rule}
 ''')
 
-def find_neighborhoods(tick):
-    return find_neighborhoods_template.format(header=header, tick=tick)
+# cells per rule to keep for the display nodes
+sample = 10
 
-rule_header_template = header + '\n' + cleandoc('''
-     # get neighborhoods
-     cat /conducto/data/pipeline/neighborhoods_{tick} > neighborhoods.json
-''')
+def find_neighborhoods(tick, rule):
+    return find_neighborhoods_template.format(header=header, tick=tick, rule=rule,
+                                              sample=sample)
 
-# which cells die because of too-few neighbors?
-isolate_template = cleandoc('''
-     {rule_header}
-     cat neighborhoods.json \\
-         | jq 'map(select(.alive == true and .neighbors < 2)
-                   | .alive = false)' \\
-         | tee isolations.json \\
-         > /conducto/data/pipeline/isolations_{tick}
-
-     cat isolations.json
+# show how many cells a rule applied to, and a few of them
+rule_template = cleandoc('''
+     {header}
+     echo -n "{rule}: "
+     jq .{rule} /conducto/data/pipeline/rules_{tick}/counts.json
+     if [ -f /conducto/data/pipeline/rules_{tick}/{rule} ]; then
+         echo "the first few:"
+         cat /conducto/data/pipeline/rules_{tick}/{rule}
+     fi
 ''')
 
+def show_rule(rule, tick):
+    return rule_template.format(header=header, rule=rule, tick=tick, sample=sample)
+
+# which cells die because of too-few neighbors?
 def isolate(tick):
-    rule_header = rule_header_template.format(tick=tick)
-    return isolate_template.format(rule_header=rule_header, tick=tick)
+    return show_rule("isolate", tick)
 
 # which cells survive because of ideal neighbor density?
-survive_template = cleandoc('''
-     {rule_header}
-     cat neighborhoods.json \\
-         | jq 'map(select(.alive == true
-                          and (.neighbors == 2 or .neighbors == 3))) '\\
-         | tee survivals.json \\
-         > /conducto/data/pipeline/survivals_{tick}
-
-     cat survivals.json
-''')
-
 def survive(tick):
-    rule_header = rule_header_template.format(tick=tick)
-    return survive_template.format(rule_header=rule_header, tick=tick)
+    return show_rule("survive", tick)
 
 # which cells die because of crowding?
-crowd_template = cleandoc('''
-     {rule_header}
-     cat neighborhoods.json \\
-         | jq 'map(select(.alive == true and .neighbors > 3)
-                   | .alive = false)' \\
-         | tee crowdings.json \\
-         > /conducto/data/pipeline/crowdings_{tick}
-
-     cat crowdings.json
-''')
-
 def crowd(tick):
-    rule_header = rule_header_template.format(tick=tick)
-    return crowd_template.format(rule_header=rule_header, tick=tick)
+    return show_rule("crowd", tick)
 
 # which cells come alive because of reproduction?
-reproduce_template = cleandoc('''
-     {rule_header}
-     cat neighborhoods.json \\
-         | jq 'map(select(.alive == false and .neighbors == 3)
-                   | .alive = true)' \\
-         | tee reproductions.json \\
-         > /conducto/data/pipeline/reproductions_{tick}
-
-     cat reproductions.json
-''')
-
 def reproduce(tick):
-    rule_header = rule_header_template.format(tick=tick)
-    return reproduce_template.format(rule_header=rule_header, tick=tick)
+    return show_rule("reproduce", tick)
 
 # which cells were dead and stay dead
-ignore_template = cleandoc('''
-     {rule_header}
-     cat neighborhoods.json \\
-         | jq 'map(select(.alive == false and .neighbors != 3)
-                   | .alive = false)' \\
-         | tee ignores.json \\
-         > /conducto/data/pipeline/ignores_{tick}
-
-     cat ignores.json
-''')
-
 def ignore(tick):
-    rule_header = rule_header_template.format(tick=tick)
-    return ignore_template.format(rule_header=rule_header, tick=tick)
+    return show_rule("ignore", tick)
 
 # pull updated cells into grid for next tick
 next_grid_template = cleandoc('''
      {header}
-     # get grids so far
-     cat /conducto/data/pipeline/grids > grids.json
-
-     # get rule outputs
-     cat /conducto/data/pipeline/isolations_{tick}    | jq '.[]' > isolations.json
-     cat /conducto/data/pipeline/survivals_{tick}     | jq '.[]' > survivals.json
-     cat /conducto/data/pipeline/crowdings_{tick}     | jq '.[]' > crowdings.json
-     cat /conducto/data/pipeline/reproductions_{tick} | jq '.[]' > reproductions.json
-     cat /conducto/data/pipeline/ignores_{tick}       | jq '.[]' > ignores.json
-
-     # make grid from them
-     cat isolations.json survivals.json crowdings.json reproductions.json ignores.json \\
-         | jq -s . \\
-         | to_grid \\
-         | tee new_grid.json
-
-
-     # append it to the grid list
-     cat grids.json | jq ". + [$(cat new_grid.json)]" \\
-         | tee updated_grids.json \\
-         > /conducto/data/pipeline/"grids"
-
-     cat updated_grids.json
+     # apply the cells the rules changed to the most recent grid
+     life_history latest /conducto/data/pipeline/history --packed \\
+         | life_delta apply /conducto/data/pipeline/rules_{tick}/delta --packed \\
+         > next_grid
+     cat next_grid | to_grid
+
+     # append it to the history
+     cat next_grid | life_history append /conducto/data/pipeline/history
 ''')
 
 def next_grid(tick):
     return next_grid_template.format(header=header, tick=tick)
 
+# note the new grid, leave a marker if it was seen before
+remember_template = cleandoc('''
+     {header}
+     life_history latest /conducto/data/pipeline/history | remember_grid {tick} {seen_dir}
+''')
+
+def remember(tick):
+    return remember_template.format(header=header, tick=tick, seen_dir=seen_dir)
+
 animate_template = cleandoc('''
     {header}
-    # make a gif
-    convert -delay 50 /conducto/data/pipeline/image_*.png -loop 0 /conducto/data/pipeline/life.gif
+    # make a gif, streaming one grid at a time
+    life_history frames /conducto/data/pipeline/history --packed \\
+        | life_animate /conducto/data/pipeline/life.gif 500
     IMAGE_URL=$(conducto-data-pipeline url --name "life.gif" | sed 's/"//g')
 
     # display it
@@ -200,49 +148,264 @@ animate_template = cleandoc('''
     </ConductoMarkdown>"
 ''')
 
+# play a batch of ticks in one process instead of one node per rule per tick
+run_batch_template = cleandoc('''
+     {header}
+     # get most recent grid
+     life_history latest /conducto/data/pipeline/history > grid.json
+
+     # play the whole batch in memory, append it to the history
+     cat grid.json | life_run {size} --packed --rule {rule} \\
+         | life_history append /conducto/data/pipeline/history > /dev/null
+
+     echo "grids so far:"
+     life_history count /conducto/data/pipeline/history
+''')
+
+def run_batch(size, rule):
+    return run_batch_template.format(header=header,
+                                     size=size,
+                                     rule=rule)
+
+render_frames_template = cleandoc('''
+     {header}
+     # draw the frames that aren't drawn yet
+     life_render /conducto/data/pipeline/history {frames_dir} {first} {stop} \\
+         > frames.txt
+
+     # display them
+     echo "<ConductoMarkdown>"
+     while read tick frame; do
+         IMAGE_URL=$(conducto-data-pipeline url --name "frames/$frame" | sed 's/"//g')
+         echo "tick $tick"
+         echo ""
+         echo "![grid$tick]($IMAGE_URL)"
+         echo ""
+     done < frames.txt
+     echo "</ConductoMarkdown>"
+''')
+
+def render_frames(first, stop):
+    return render_frames_template.format(header=header,
+                                         first=first,
+                                         stop=stop,
+                                         frames_dir=frames_dir)
+
 def animate(image_list):
     return animate_template.format(header=header,
                                    image_list=image_list)
 
+# tiles of the grid, and the halos they borrow from each other
+tiles_dir = "/conducto/data/pipeline/tiles"
+
+split_tiles_template = cleandoc('''
+     {header}
+     # cut the most recent grid into tiles
+     life_history latest /conducto/data/pipeline/history \\
+         | life_tile split {tiles} {halo} {tiles_dir}
+     cat {tiles_dir}/layout.json
+''')
+
+def split_tiles(tiles, halo):
+    return split_tiles_template.format(header=header,
+                                       tiles=tiles,
+                                       halo=halo,
+                                       tiles_dir=tiles_dir)
+
+def step_tile(round_, row, col, generations):
+    return (f"{header}\n"
+            f"life_tile step {round_} {row} {col} {generations} {tiles_dir}")
+
+join_tiles_template = cleandoc('''
+     {header}
+     # put the tiles back together
+     life_tile join {round} {tiles_dir} | tee grid.json
+
+     # make an image
+     cat grid.json | to_png /conducto/data/pipeline/tiled.png {tick}
+     IMAGE_URL=$(conducto-data-pipeline url --name "tiled.png" | sed 's/"//g')
+
+     # display it
+     echo -n "<ConductoMarkdown>
+     ![tiled]($IMAGE_URL)
+     </ConductoMarkdown>"
+''')
+
+def join_tiles(round_, tick):
+    return join_tiles_template.format(header=header,
+                                      round=round_,
+                                      tick=tick,
+                                      tiles_dir=tiles_dir)
+
+# many random soups, surveyed in chunks of seeds
+ensemble_dir = "/conducto/data/pipeline/ensemble"
+
+def survey_seeds(first_seed, count, side, max_generations, rule):
+    return (f"{header}\n"
+            f"mkdir -p {ensemble_dir}\n"
+            f"life_ensemble {first_seed} {count} {side} {max_generations} --rule {rule} "
+            f"> {ensemble_dir}/seeds_{first_seed:08d}.jsonl")
+
+summarize_ensemble_template = cleandoc('''
+     {header}
+     # one summary per seed, in seed order
+     cat {ensemble_dir}/seeds_*.jsonl > {ensemble_dir}/summary.jsonl
+
+     # how did they end up?
+     jq -s '{{ seeds     : length,
+               settled   : map(select(.period != null)) | length,
+               oscillate : map(select(.period > 1)) | length,
+               died      : map(select(.population == 0)) | length,
+               lifespan  : (map(.lifespan | select(. != null))
+                            | if length > 0 then add / length | floor else null end),
+               longest   : (max_by(.lifespan) | {{ seed, lifespan }}) }}' \\
+         {ensemble_dir}/summary.jsonl
+''')
+
+def summarize_ensemble():
+    return summarize_ensemble_template.format(header=header,
+                                              ensemble_dir=ensemble_dir)
+
 # Pipeline Definition
 #####################
 
-num_ticks = 15
-ticks = [ str(i).zfill(len(str(num_ticks))) for i in range(num_ticks) ]
+# one clock tick, from drawing the grid to storing the next one
+def play_tick(tick, next_tick, rule) -> co.Serial:
+
+    iteration = co.Serial(image=game_of_life)
+
+    iteration["find neighbors"] = co.Exec(find_neighborhoods(tick, rule))
+
+    rules = co.Parallel(image=game_of_life)
+    rules["isolate"]   = co.Exec(isolate(tick))
+    rules["survive"]   = co.Exec(survive(tick))
+    rules["crowd"]     = co.Exec(crowd(tick))
+    rules["reproduce"] = co.Exec(reproduce(tick))
+    rules["ignore"]    = co.Exec(ignore(tick))
+    iteration["apply_rules"] = rules
+
+    iteration["next grid"]     = co.Exec(next_grid(tick))
+    iteration["remember grid"] = co.Exec(remember(next_tick))
+
+    return iteration
+
+# lazy node, plays one tick and then extends itself with another lazy node
+# stops once a grid state repeats (a still life or an oscillator)
+# or after max_ticks, in case the pattern never settles
+def play(tick: int = 0, max_ticks: int = 100, rule: str = "B3/S23") -> co.Serial:
+
+    width = len(str(max_ticks))
+
+    with co.Serial(image=lazy_game_of_life) as node:
+
+        if os.path.exists(os.path.join(seen_dir, "repeat")):
+            node["cycle found"] = co.Exec(f"cat {seen_dir}/repeat")
+
+        elif tick >= max_ticks:
+            node["out of ticks"] = co.Exec(f"echo 'no repeat after {max_ticks} ticks'")
+
+        else:
+            node[f"tick {str(tick).zfill(width)}"] = play_tick(str(tick).zfill(width),
+                                                               tick + 1, rule)
+            node["continue"] = co.Lazy(
+                f"python pipeline.py play --tick={tick + 1} --max_ticks={max_ticks} "
+                f"--rule={rule}"
+            )
+
+    return node
+
+# draw every grid in the history, a chunk of ticks per node
+def render_stage(count, chunk) -> co.Parallel:
+
+    width = len(str(count - 1))
+
+    with co.Parallel(image=game_of_life) as stage:
+        for first in range(0, count, chunk):
+            stop = min(first + chunk, count)
+            name = f"ticks {str(first).zfill(width)}-{str(stop - 1).zfill(width)}"
+            stage[name] = co.Exec(render_frames(first, stop))
+
+    return stage
+
+# lazy node, for when the number of grids is only known once the game is over
+def render(chunk: int = 10) -> co.Parallel:
+
+    from life.history import History
+    return render_stage(len(History("/conducto/data/pipeline/history")), chunk)
 
 # root node
-def life() -> co.Serial:
+# rule is any life-like rule in B/S notation, like B36/S23 for HighLife
+def life(max_ticks: int = 100, rule: str = "B3/S23") -> co.Serial:
+
+    with co.Serial(image=lazy_game_of_life) as pipeline:
+
+        pipeline["initialize grid"] = co.Exec(initialize_grid)
+        pipeline["play"] = co.Lazy(
+            f"python pipeline.py play --tick=0 --max_ticks={max_ticks} --rule={rule}"
+        )
+        pipeline["render"] = co.Lazy("python pipeline.py render")
+        pipeline["animate"] = co.Exec(animate(""))
+
+    return pipeline
+
+# root node, plays several ticks per node
+def life_batched(num_ticks: int = 15, batch_size: int = 5,
+                 rule: str = "B3/S23") -> co.Serial:
 
+    width = len(str(num_ticks))
 
     with co.Serial(image=game_of_life) as pipeline:
 
         pipeline["initialize grid"] = co.Exec(initialize_grid)
 
-        image_names = []
-        # TODO: instead of modeling a fixed number of clock ticks
-        # use a lazy node to extend this until a grid state is repeated
-        for tick in ticks:
-            with co.Serial(name=f"tick {tick}",
-                           image=game_of_life) as iteration:
+        for first in range(0, num_ticks, batch_size):
+            size = min(batch_size, num_ticks - first)
+            last = first + size - 1
+            name = f"ticks {str(first).zfill(width)}-{str(last).zfill(width)}"
+            pipeline[name] = co.Exec(run_batch(size, rule))
 
-                iteration["show grid"]      = co.Exec(show_grid(tick))
-                iteration["find neighbors"] = co.Exec(find_neighborhoods(tick))
+        pipeline["render"] = render_stage(num_ticks + 1, batch_size)
+        pipeline["animate"] = co.Exec(animate(""))
+
+    return pipeline
 
-                with co.Parallel(name=f"apply_rules",
-                               image=game_of_life) as rules:
+# root node, steps tiles of the grid in parallel
+# tiles trade halos between rounds, a halo of h covers h ticks per round
+def life_tiled(num_ticks: int = 16, tiles: int = 2, halo: int = 4) -> co.Serial:
 
-                    rules["isolate"]   = co.Exec(isolate(tick))
-                    rules["survive"]   = co.Exec(survive(tick))
-                    rules["crowd"]     = co.Exec(crowd(tick))
-                    rules["reproduce"] = co.Exec(reproduce(tick))
-                    rules["ignore"]    = co.Exec(ignore(tick))
+    with co.Serial(image=game_of_life) as pipeline:
+
+        pipeline["initialize grid"] = co.Exec(initialize_grid)
+        pipeline["split"] = co.Exec(split_tiles(tiles, halo))
 
-                iteration["next grid"] = co.Exec(next_grid(tick))
+        round_ = 0
+        for first in range(0, num_ticks, halo):
+            generations = min(halo, num_ticks - first)
+            last = first + generations - 1
+            with co.Parallel(name=f"ticks {first}-{last}") as tick_round:
+                for row in range(tiles):
+                    for col in range(tiles):
+                        tick_round[f"tile {row},{col}"] = co.Exec(
+                            step_tile(round_, row, col, generations))
+            round_ += 1
+
+        pipeline["join"] = co.Exec(join_tiles(round_, num_ticks))
+
+    return pipeline
+
+# survey how random soups play out, a chunk of seeds per node
+def life_ensemble(seeds: int = 1000, side: int = 32, chunk: int = 250,
+                  max_generations: int = 1000, rule: str = "B3/S23") -> co.Serial:
+
+    with co.Serial(image=game_of_life) as pipeline:
 
-            image_names.append(f"image_{tick}.png")
+        with co.Parallel(name="survey") as survey:
+            for first in range(0, seeds, chunk):
+                count = min(chunk, seeds - first)
+                survey[f"seeds {first}-{first + count - 1}"] = co.Exec(
+                    survey_seeds(first, count, side, max_generations, rule))
 
-        image_list = " ".join(image_names)
-        pipeline["animate"] = co.Exec(animate(image_list))
+        pipeline["summarize"] = co.Exec(summarize_ensemble())
 
     return pipeline
 